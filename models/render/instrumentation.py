@@ -0,0 +1,107 @@
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+import pandas as pd
+
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from models.render.render_dict import RenderDict
+
+log = get_logger(__name__)
+
+# Opt-in instrumentation of the RenderDict calls, enabled by `RenderScenario.instrument_render_dicts`.
+# The methods are wrapped per instance, so the tables are not slowed down if the instrumentation is not enabled.
+INSTRUMENTED_LOOKUPS = ["get_item", "get_series"]
+INSTRUMENTED_CALLS = ["get_items", "set_item", "accumulate_item"]
+REPORT_COLUMNS = ["table", "method", "stage", "calls", "misses", "default_hits", "seconds"]
+
+
+class RenderDictStats:
+    """
+    Counts the calls, misses (KeyError) and default hits (`not_found_default` returned) and the time per
+    (table, method, stage). The stage is the name of the instrumented model method being run, see `instrument_stages`.
+    """
+
+    def __init__(self):
+        self.stage = "setup"
+        # (table, method, stage) --> [calls, misses, default_hits, seconds]
+        self.records: Dict[Tuple[str, str, str], List] = defaultdict(lambda: [0, 0, 0, 0.0])
+
+    def instrument_rdict(self, table_name: str, rdict: "RenderDict"):
+        for method_name in INSTRUMENTED_LOOKUPS:
+            if hasattr(rdict, method_name):
+                setattr(rdict, method_name, self._wrap_lookup(table_name, method_name, getattr(rdict, method_name)))
+        for method_name in INSTRUMENTED_CALLS:
+            if hasattr(rdict, method_name):
+                setattr(rdict, method_name, self._wrap_call(table_name, method_name, getattr(rdict, method_name)))
+
+    def _wrap_lookup(self, table_name: str, method_name: str, method):
+
+        def instrumented_lookup(*args, not_found_default=None, **kwargs):
+            if len(args) > 1:
+                args, not_found_default = args[:1], args[1]
+            record = self.records[(table_name, method_name, self.stage)]
+            record[0] += 1
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except KeyError:
+                if not_found_default is None:
+                    record[1] += 1
+                    raise
+                record[2] += 1
+                return not_found_default
+            finally:
+                record[3] += time.perf_counter() - start_time
+
+        return instrumented_lookup
+
+    def _wrap_call(self, table_name: str, method_name: str, method):
+
+        def instrumented_call(*args, **kwargs):
+            record = self.records[(table_name, method_name, self.stage)]
+            record[0] += 1
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except KeyError:
+                record[1] += 1
+                raise
+            finally:
+                record[3] += time.perf_counter() - start_time
+
+        return instrumented_call
+
+    def instrument_stages(self, obj: Any, prefixes: Tuple[str, ...]):
+        for method_name in dir(obj):
+            if method_name.startswith(prefixes) and callable(getattr(obj, method_name)):
+                setattr(obj, method_name, self._wrap_stage(method_name, getattr(obj, method_name)))
+
+    def _wrap_stage(self, stage: str, method):
+
+        def staged_method(*args, **kwargs):
+            previous_stage, self.stage = self.stage, stage
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.stage = previous_stage
+
+        return staged_method
+
+    def get_report(self) -> pd.DataFrame:
+        df = pd.DataFrame(
+            [[*key, *record] for key, record in self.records.items()],
+            columns=REPORT_COLUMNS
+        )
+        return df.sort_values("seconds", ascending=False, ignore_index=True)
+
+    def log_report(self, table_number: int = 20):
+        df = self.get_report()
+        tables = df.groupby("table")[["calls", "misses", "default_hits", "seconds"]].sum()
+        tables = tables.sort_values("seconds", ascending=False)
+        log.info(
+            f"RenderDictStats --> {df['calls'].sum()} calls on {len(tables)} tables, {df['seconds'].sum():.2f}s in total, "
+            f"top {min(table_number, len(tables))} tables:\n{tables.head(table_number).to_string()}"
+        )
@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional, Type, TYPE_CHECKING
+
+import numpy as np
+
+from models.render.render_key import RenderKey
+
+if TYPE_CHECKING:
+    from models.render.render_dict import RenderDict
+
+
+class KeyGrid:
+    """
+    Cross product of id dimensions as key columns (one int array per id, see `RenderDict.stack_keys`),
+    so that tables can be built with `get_items` and `set_items` instead of nested loops over a RenderKey.
+    Every row is expanded into consecutive rows, so the rows are in the order of the nested loops.
+    """
+
+    def __init__(self, key_cls: Type[RenderKey] = RenderKey, **id_values: int):
+        self.key_cls = key_cls
+        self.columns: Dict[str, np.ndarray] = {
+            id_name: np.array([id_value], dtype=np.int64) for id_name, id_value in id_values.items()
+        }
+        # for each row, the row of the previous grid it was expanded from, e.g., to sum over the added dimension
+        self.parent_rows = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.parent_rows)
+
+    def _create(self, columns: Dict[str, np.ndarray], parent_rows: np.ndarray) -> "KeyGrid":
+        grid = object.__new__(self.__class__)
+        grid.key_cls = self.key_cls
+        grid.columns = columns
+        grid.parent_rows = parent_rows
+        return grid
+
+    def expand(self, id_name: str, id_values: Iterable[int]) -> "KeyGrid":
+        id_values = np.fromiter(id_values, dtype=np.int64)
+        columns = {col: np.repeat(values, len(id_values)) for col, values in self.columns.items()}
+        columns[id_name] = np.tile(id_values, len(self))
+        return self._create(columns, np.repeat(np.arange(len(self)), len(id_values)))
+
+    def expand_relation(self, id_name: str, relation: "RenderDict", first_only: Optional[bool] = False) -> "KeyGrid":
+        # the related ids depend on the ids of each row, so the relation is looked up once per row
+        rkeys = [self.key_cls().from_dict(row) for row in self.iter_rows()]
+        id_lists = [relation.get_item(rkey) for rkey in rkeys]
+        if first_only:
+            id_lists = [id_list[:1] for id_list in id_lists]
+        counts = np.array([len(id_list) for id_list in id_lists], dtype=np.int64)
+        columns = {col: np.repeat(values, counts) for col, values in self.columns.items()}
+        columns[id_name] = np.fromiter((id_value for id_list in id_lists for id_value in id_list), dtype=np.int64, count=counts.sum())
+        return self._create(columns, np.repeat(np.arange(len(self)), counts))
+
+    def filter(self, mask: np.ndarray) -> "KeyGrid":
+        return self._create({col: values[mask] for col, values in self.columns.items()}, self.parent_rows[mask])
+
+    def iter_rows(self):
+        cols = list(self.columns.keys())
+        for row in zip(*[values.tolist() for values in self.columns.values()]):
+            yield dict(zip(cols, row))
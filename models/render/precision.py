@@ -0,0 +1,25 @@
+import numpy as np
+
+# Precision of the hourly profiles, i.e., the loaded profiles, the building profiles and the r5c1 buffers.
+# float32 halves the memory of the profiles. Reductions like annual sums are always done in float64 (`sum_profile`),
+# and so is the r5c1 calculation itself, only the input and output profiles are stored in the given precision.
+PROFILE_PRECISIONS = {
+    32: np.float32,
+    64: np.float64,
+}
+_profile_dtype = np.float64
+
+
+def set_profile_precision(precision: int):
+    global _profile_dtype
+    if precision not in PROFILE_PRECISIONS:
+        raise ValueError(f"profile precision should be one of {list(PROFILE_PRECISIONS.keys())}, got {precision}")
+    _profile_dtype = PROFILE_PRECISIONS[precision]
+
+
+def get_profile_dtype():
+    return _profile_dtype
+
+
+def sum_profile(profile: np.ndarray) -> float:
+    return float(profile.sum(dtype=np.float64))
@@ -1,17 +1,42 @@
-import math
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable
+from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import TYPE_CHECKING
 from typing import Union
+import numpy as np
 import pandas as pd
 from tab2dict import TabDict
 
+from models.render.precision import get_profile_dtype
+from utils.funcs import CategoricalSampler
+
 if TYPE_CHECKING:
     from models.render.render_key import RenderKey
 
 TabDictType = Union["ID", "Relation", "Data"]
 
 
+@lru_cache(maxsize=None)
+def get_region_level(id_region: int) -> int:
+    # 1 digit --> NUTS0, 3 digits --> NUTS1, 5 digits --> NUTS2, 7 digits --> NUTS3
+    region_level = 0
+    while id_region >= 10:
+        id_region //= 100
+        region_level += 1
+    return region_level
+
+
+@lru_cache(maxsize=None)
+def convert_id_region(id_region: int, region_level: int) -> int:
+    # truncates id_region to a higher region level, e.g., 9010101 (NUTS3) --> 90101 (NUTS2)
+    return id_region // 100 ** max(get_region_level(id_region) - region_level, 0)
+
+
 class RenderDict(TabDict):
 
     def __init__(
@@ -34,6 +59,54 @@ class RenderDict(TabDict):
             tdict_data=tdict_data
         )
         self.region_level = region_level
+        self._samplers: Dict[tuple, CategoricalSampler] = {}
+
+    @property
+    def region_level(self) -> Optional[int]:
+        return self._region_level
+
+    @region_level.setter
+    def region_level(self, region_level: Optional[int]):
+        self._region_level = region_level
+        self._init_key_builders()
+
+    def _init_key_builders(self):
+        self._get_key = self._create_key_builder(self.key_cols, self._region_level)
+        self._get_key_values = self._create_key_builder(self.key_cols, None)
+
+    @staticmethod
+    def _create_key_builder(key_cols: List[str], region_level: Optional[int]) -> Callable[["RenderKey"], tuple]:
+        """
+        The key builder is created once per RenderDict (and again if region_level changes),
+        so that each `get_item` costs one tuple build and one dict probe.
+        """
+        get_key_values = attrgetter(*key_cols)
+        if len(key_cols) == 1:
+            def get_key(rkey: "RenderKey") -> tuple:
+                return get_key_values(rkey),
+        else:
+            get_key = get_key_values
+        if region_level is None or "id_region" not in key_cols:
+            return get_key
+
+        region_index = key_cols.index("id_region")
+
+        def get_key_with_region_level_check(rkey: "RenderKey") -> tuple:
+            key = get_key(rkey)
+            id_region = key[region_index]
+            if id_region is not None and get_region_level(id_region) > region_level:
+                key = key[:region_index] + (convert_id_region(id_region, region_level),) + key[region_index + 1:]
+            return key
+
+        return get_key_with_region_level_check
+
+    def __getstate__(self):
+        # the key builders are closures and are created again after unpickling
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_get_")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_key_builders()
 
     def keys(self):
         if self.tdict_type in ["ID", "Relation"]:
@@ -54,65 +127,305 @@ class RenderDict(TabDict):
         rdict.region_level = region_level
         return rdict
 
-    def _tkey2tuple_with_region_level_check(self, rkey: "RenderKey") -> tuple:
+    def _tkey2tuple(self, rkey: "RenderKey") -> tuple:
+        # RenderKey is slotted, so the `__dict__` lookup of TabDict is replaced by the key builder
+        return tuple([int(value) for value in self._get_key_values(rkey)])
 
-        def calc_region_level(id_region):
-            return math.ceil(len(list(str(id_region))) / 2) - 1
-
-        def convert_id_region(rkey_id_region: int):
-            rkey_id_region_list = list(str(rkey_id_region))
-            rkey_region_level = math.ceil(len(rkey_id_region_list) / 2) - 1
-            return int("".join(rkey_id_region_list[:- 2 * (rkey_region_level - self.region_level)]))
-
-        if (
-            rkey.id_region is not None and
-            self.region_level is not None and
-            calc_region_level(rkey.id_region) > self.region_level
-        ):
-            key_list = []
-            for col in self.key_cols:
-                if col != "id_region":
-                    key_list.append(int(rkey.__dict__[col]))
-                else:
-                    key_list.append(convert_id_region(int(rkey.__dict__[col])))
-            key = tuple(key_list)
-        else:
-            key = tuple([int(rkey.__dict__[col]) for col in self.key_cols])
-        return key
+    def _tkey2tuple_with_region_level_check(self, rkey: "RenderKey") -> tuple:
+        return self._get_key(rkey)
 
     def get_item(self, rkey: "RenderKey", not_found_default=None):
-        key = self._tkey2tuple_with_region_level_check(rkey)
-        if key in self._data.keys():
-            value = self._data[key]
-        else:
+        try:
+            value = self._data[self._get_key(rkey)]
+        except KeyError:
             if not_found_default is not None:
                 value = not_found_default
             else:
                 raise KeyError
         return value
 
+    def stack_keys(self, rkeys: List["RenderKey"], **id_values: int) -> Dict[str, np.ndarray]:
+        """
+        Converts the rkeys to the columnar keys of `get_items`, with one int array per key column.
+        The ids in `id_values` are used for all rkeys instead of their own ids.
+        """
+        keys = {}
+        for key_col in self.key_cols:
+            if key_col in id_values:
+                keys[key_col] = np.full(len(rkeys), id_values[key_col], dtype=np.int64)
+            else:
+                keys[key_col] = np.fromiter(map(attrgetter(key_col), rkeys), dtype=np.int64, count=len(rkeys))
+        return keys
+
+    def _convert_key_columns(self, keys: Dict[str, np.ndarray], key_cols: List[str]) -> List[tuple]:
+        columns = [np.asarray(keys[key_col]) for key_col in key_cols]
+        if self._region_level is not None and "id_region" in key_cols:
+            region_index = key_cols.index("id_region")
+            id_regions, inverse = np.unique(columns[region_index], return_inverse=True)
+            converted_id_regions = np.array(
+                [convert_id_region(int(id_region), self._region_level) for id_region in id_regions],
+                dtype=np.int64
+            )
+            columns[region_index] = converted_id_regions[inverse]
+        return list(zip(*[column.tolist() for column in columns]))
+
+    def get_items(self, keys: Dict[str, np.ndarray], not_found_default=None) -> np.ndarray:
+        """
+        Batched `get_item`: `keys` has one array per key column (see `stack_keys`),
+        and the values are returned as an array in the same order.
+        """
+        not_found = object()
+        values = [self._data.get(key, not_found) for key in self._convert_key_columns(keys, self.key_cols)]
+        for index, value in enumerate(values):
+            if value is not_found:
+                if not_found_default is not None:
+                    values[index] = not_found_default
+                else:
+                    raise KeyError
+        return np.array(values)
+
     def set_item(self, rkey: "RenderKey", value):
+        self._samplers.clear()
         super().set_item(tkey=rkey, value=value)
 
+    def set_items(self, keys: Dict[str, np.ndarray], values: np.ndarray):
+        """
+        Batched `set_item`: as in `_tkey2tuple`, the keys are stored without region level conversion.
+        """
+        self._samplers.clear()
+        self._data.update(zip(zip(*[np.asarray(keys[key_col]).tolist() for key_col in self.key_cols]), values))
+
+    def set_key_id(self, id_name: str, id_value: int):
+        """
+        Sets `id_name` of all keys to `id_value`, e.g., to reuse a table in a scenario with another id.
+        """
+        if id_name in self.key_cols:
+            i = self.key_cols.index(id_name)
+            self._data = {key[:i] + (id_value,) + key[i + 1:]: value for key, value in self._data.items()}
+            self._samplers.clear()
+
     def accumulate_item(self, rkey: "RenderKey", value):
+        self._samplers.clear()
         super().accumulate_item(tkey=rkey, value=value)
 
+    def get_sampler(self, rkey: "RenderKey", dimension_name: str, dimension_ids: Iterable[int]) -> CategoricalSampler:
+        """
+        Returns the sampler of `dimension_name` over `dimension_ids`, with the values of this RenderDict as weights.
+        The samplers are cached by the key of rkey without the dimension, i.e., the other ids it is conditioned on.
+        """
+        dimension_ids = tuple(dimension_ids)
+        key = self._get_key(rkey)
+        if dimension_name in self.key_cols:
+            dimension_index = self.key_cols.index(dimension_name)
+            key = key[:dimension_index] + (None,) + key[dimension_index + 1:]
+        sampler_key = (dimension_name, dimension_ids, key)
+        sampler = self._samplers.get(sampler_key)
+        if sampler is None:
+            dimension_rkey = rkey.make_copy()
+            d = {}
+            for dimension_id in dimension_ids:
+                setattr(dimension_rkey, dimension_name, dimension_id)
+                d[dimension_id] = self.get_item(dimension_rkey)
+            sampler = CategoricalSampler(d)
+            self._samplers[sampler_key] = sampler
+        return sampler
+
+
+class DenseRenderDict(RenderDict):
+
+    def __init__(
+        self,
+        key_cols: List[str],
+        index: Dict[tuple, int],
+        values: np.ndarray,
+        start_year: int,
+        region_level: Optional[int] = None
+    ):
+        """
+        Scenario tables with a year axis: each key without year is mapped to a row of `values`,
+        and the columns of `values` are the consecutive years from `start_year`.
+        `key_cols` keeps "year" as the last key column, so that the tables can be used like a RenderDict.
+        """
+        self._index = index
+        self._values = values
+        self.start_year = start_year
+        super().__init__(
+            tdict_type="Data",
+            key_cols=key_cols,
+            tdict_data={},
+            region_level=region_level
+        )
+
+    def _init_key_builders(self):
+        super()._init_key_builders()
+        self._get_row_key = self._create_key_builder(self.key_cols[:-1], self._region_level)
+        self._get_row_key_values = self._create_key_builder(self.key_cols[:-1], None)
+
     @classmethod
-    def from_profile_dataframe(
-            cls,
-            df: pd.DataFrame,
-            tdict_type: TabDictType,
-        ):
+    def from_year_dataframe(cls, df: pd.DataFrame, region_level: Optional[int] = None):
+        index_cols = [col for col in df.columns if str(col).startswith("id_")]
+        year_cols = [col for col in df.columns if not str(col).startswith(("id_", "unit"))]
+        years = [int(col) for col in year_cols]
+        assert years == list(range(years[0], years[0] + len(years))), "year columns must be consecutive."
+        # as in the dict-based RenderDict, a duplicated key is overwritten by the later row
+        index = {
+            key: row for row, key in enumerate(zip(*[df[col].astype(int).tolist() for col in index_cols]))
+        }
+        # a writable float64 copy, so that the values can be set and accumulated regardless of the dtype of the source
+        return cls(
+            key_cols=index_cols + ["year"],
+            index=index,
+            values=df[year_cols].to_numpy(dtype=np.float64, copy=True),
+            start_year=years[0],
+            region_level=region_level
+        )
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # index array: the key ids (without year) followed by the row in `values`, see `models.render.shared_tables`
+        index = np.array([key + (row,) for key, row in self._index.items()], dtype=np.int64)
+        return index.reshape(len(self._index), len(self.key_cols)), self._values
+
+    @property
+    def years(self) -> range:
+        return range(self.start_year, self.start_year + self._values.shape[1])
+
+    def __len__(self):
+        return len(self._index) * self._values.shape[1]
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        for key, row in self._index.items():
+            for year, value in zip(self.years, self._values[row]):
+                yield key + (year,), value
+
+    def to_dataframe(self):
+        df = pd.DataFrame([key for key in self._index.keys()], columns=self.key_cols[:-1])
+        df = df.loc[np.repeat(np.arange(len(df)), self._values.shape[1])].reset_index(drop=True)
+        df["year"] = np.tile(np.array(self.years), len(self._index))
+        df["value"] = self._values[list(self._index.values())].ravel()
+        return df
+
+    def get_year_index(self, year: int) -> int:
+        year_index = year - self.start_year
+        if not 0 <= year_index < self._values.shape[1]:
+            raise KeyError(year)
+        return year_index
+
+    def get_item(self, rkey: "RenderKey", not_found_default=None):
+        try:
+            value = self._values[self._index[self._get_row_key(rkey)], self.get_year_index(rkey.year)]
+        except KeyError:
+            if not_found_default is not None:
+                value = not_found_default
+            else:
+                raise KeyError
+        return value
+
+    def get_items(self, keys: Dict[str, np.ndarray], not_found_default=None) -> np.ndarray:
+        rows = np.array([self._index.get(key, -1) for key in self._convert_key_columns(keys, self.key_cols[:-1])], dtype=np.int64)
+        year_indices = np.asarray(keys["year"]) - self.start_year
+        found = (rows >= 0) & (year_indices >= 0) & (year_indices < self._values.shape[1])
+        if found.all():
+            return self._values[rows, year_indices]
+        if not_found_default is None:
+            raise KeyError
+        return np.where(found, self._values[np.where(found, rows, 0), np.where(found, year_indices, 0)], not_found_default)
+
+    def get_series(self, rkey: "RenderKey", not_found_default=None) -> np.ndarray:
+        """
+        Returns the values of all years (from `start_year`) as a read-only view, `rkey.year` is not used.
+        """
+        try:
+            series = self._values[self._index[self._get_row_key(rkey)]]
+        except KeyError:
+            if not_found_default is not None:
+                return not_found_default
+            else:
+                raise KeyError
+        series.flags.writeable = False
+        return series
+
+    def set_item(self, rkey: "RenderKey", value):
+        row_key = tuple([int(id_value) for id_value in self._get_row_key_values(rkey)])
+        if row_key not in self._index:
+            self._index[row_key] = len(self._values)
+            self._values = np.vstack([self._values, np.full((1, self._values.shape[1]), np.nan)])
+        self._samplers.clear()
+        self._values[self._index[row_key], self.get_year_index(rkey.year)] = value
+
+    def set_items(self, keys: Dict[str, np.ndarray], values: np.ndarray):
+        row_keys = list(zip(*[np.asarray(keys[key_col]).tolist() for key_col in self.key_cols[:-1]]))
+        new_row_keys = [row_key for row_key in dict.fromkeys(row_keys) if row_key not in self._index]
+        if new_row_keys:
+            for row, row_key in enumerate(new_row_keys, start=len(self._values)):
+                self._index[row_key] = row
+            self._values = np.vstack([self._values, np.full((len(new_row_keys), self._values.shape[1]), np.nan)])
+        year_indices = np.asarray(keys["year"]) - self.start_year
+        if not ((year_indices >= 0) & (year_indices < self._values.shape[1])).all():
+            raise KeyError
+        self._samplers.clear()
+        self._values[[self._index[row_key] for row_key in row_keys], year_indices] = values
+
+    def set_key_id(self, id_name: str, id_value: int):
+        if id_name in self.key_cols[:-1]:
+            i = self.key_cols.index(id_name)
+            self._index = {key[:i] + (id_value,) + key[i + 1:]: row for key, row in self._index.items()}
+            self._samplers.clear()
+
+    def accumulate_item(self, rkey: "RenderKey", value):
+        # the years of a newly added row are NaN before they are set
+        current_value = self.get_item(rkey, not_found_default=0)
+        self.set_item(rkey, value if np.isnan(current_value) else current_value + value)
+
+
+class ProfileRenderDict(RenderDict):
+
+    def __init__(
+        self,
+        key_cols: List[str],
+        index: Dict[tuple, int],
+        values: np.ndarray,
+        region_level: Optional[int] = None
+    ):
+        """
+        Profile tables: the profiles are the rows of one read-only 2-D array,
+        and the dict entries are views of these rows, so that `get_item` does not copy.
+        """
+        values.flags.writeable = False
+        self._index = index
+        self._values = values
+        super().__init__(
+            tdict_type="Data",
+            key_cols=key_cols,
+            tdict_data={key: values[row] for key, row in index.items()},
+            region_level=region_level
+        )
+
+    @classmethod
+    def from_profile_dataframe(cls, df: pd.DataFrame, region_level: Optional[int] = None):
         key_cols = [col for col in df.columns if col.startswith(("id_", "year"))]
         val_cols = [col for col in df.columns if not col.startswith(("id_", "year", "unit"))]
-        tdict_data = {}
-        for _, row in df.iterrows():
-            key = []
-            for key_col in key_cols:
-                key.append(row[key_col])
-            tdict_data[tuple(key)] = row.loc[val_cols].astype(float).to_numpy()
-        return cls._construct_tdict(
-            tdict_type=tdict_type,
+        # as in the dict-based RenderDict, a duplicated key is overwritten by the later row
+        index = {key: row for row, key in enumerate(zip(*[df[col].astype(int).tolist() for col in key_cols]))}
+        return cls(
             key_cols=key_cols,
-            tdict_data=tdict_data
+            index=index,
+            values=df[val_cols].to_numpy(dtype=get_profile_dtype()),
+            region_level=region_level
         )
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # index array: the key ids followed by the row in `values`, see `models.render.shared_tables`
+        index = np.array([key + (row,) for key, row in self._index.items()], dtype=np.int64)
+        return index.reshape(len(self._index), len(self.key_cols) + 1), self._values
+
+    def set_key_id(self, id_name: str, id_value: int):
+        super().set_key_id(id_name, id_value)
+        if id_name in self.key_cols:
+            i = self.key_cols.index(id_name)
+            self._index = {key[:i] + (id_value,) + key[i + 1:]: row for key, row in self._index.items()}
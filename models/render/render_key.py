@@ -1,14 +1,31 @@
+import math
+from operator import attrgetter
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import TYPE_CHECKING
 
-from tab2dict import TabKey
+import pandas as pd
 
-from models.render.render_dict import RenderDict
-from utils.funcs import dict_sample
+if TYPE_CHECKING:
+    from models.render.render_dict import RenderDict
 
 
-class RenderKey(TabKey):
+class RenderKey:
+    """
+    Keys are slotted: subclasses declare their additional ids in `__slots__` and the field order
+    (parent ids first) is collected in `_fields`, which replaces the `__dict__` iteration of `TabKey`.
+    """
+
+    __slots__ = (
+        "id_scenario",
+        "id_region",
+        "id_sector",
+        "id_subsector",
+        "id_subsector_agent",
+        "id_energy_carrier",
+        "year",
+    )
 
     def __init__(
             self,
@@ -28,28 +45,85 @@ class RenderKey(TabKey):
         self.id_energy_carrier = id_energy_carrier
         self.year = year
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._init_fields()
+
+    @classmethod
+    def _init_fields(cls):
+        cls._fields = tuple(field for klass in reversed(cls.__mro__) for field in klass.__dict__.get("__slots__", ()))
+        cls._get_values = attrgetter(*cls._fields)
+        # the copy function is generated once per class with one assignment per field (like dataclasses do),
+        # so that copying a key does not loop over its fields
+        lines = ["def make_copy(self):", "    rkey = new(cls)"]
+        lines += [f"    rkey.{field} = self.{field}" for field in cls._fields]
+        lines += ["    return rkey"]
+        namespace = {}
+        exec("\n".join(lines), {"new": object.__new__, "cls": cls}, namespace)
+        cls.make_copy = namespace["make_copy"]
+
     def __str__(self):
         d = {}
         for key_col in self.key_cols:
-            d[key_col] = self.__dict__[key_col]
+            d[key_col] = getattr(self, key_col)
         return f"<RenderKey{d}>"
 
+    def __getstate__(self):
+        return self._get_values(self)
+
+    def __setstate__(self, state):
+        for field, value in zip(self._fields, state):
+            setattr(self, field, value)
+
+    @property
+    def key_cols(self):
+        return [field for field, value in zip(self._fields, self._get_values(self)) if value is not None]
+
+    def make_copy(self):
+        # replaced by the generated copy function of each class in `_init_fields`
+        rkey = object.__new__(self.__class__)
+        rkey.__setstate__(self.__getstate__())
+        return rkey
+
+    def with_(self, **overrides):
+        rkey = self.make_copy()
+        for id_name, id_value in overrides.items():
+            setattr(rkey, id_name, id_value)
+        return rkey
+
+    def from_dict(self, d: dict):
+        for key, value in d.items():
+            if key in self._fields:
+                setattr(self, key, value)
+        return self
+
     def set_id(self, id_values: Dict[str, int]):
         for id_name, id_value in id_values.items():
-            self.__dict__[id_name] = id_value
+            setattr(self, id_name, id_value)
         return self
 
+    def filter_dataframe(self, df: pd.DataFrame):
+        query = ""
+        for key, value in zip(self._fields, self._get_values(self)):
+            if (
+                key.startswith("id")
+                and value is not None
+                and not math.isnan(value)
+                and key in list(df.columns)
+            ):
+                query += f"`{key}` == {value} and "
+        return df.query(query[:-5])
+
     def init_dimension(self, dimension_name: str, dimension_ids: List[int], rdict: "RenderDict"):
-        d = {}
-        for dimension_id in dimension_ids:
-            self.__dict__[dimension_name] = dimension_id
-            d[dimension_id] = rdict.get_item(self)
-        self.__dict__[dimension_name] = dict_sample(d)
+        setattr(self, dimension_name, rdict.get_sampler(self, dimension_name, dimension_ids).sample())
 
     def to_dict(self):
         d = {}
-        for key, value in self.__dict__.items():
+        for key, value in zip(self._fields, self._get_values(self)):
             if key.startswith("id") or key.startswith("year"):
                 if value is not None:
                     d[key] = value
         return d
+
+
+RenderKey._init_fields()
@@ -1,18 +1,90 @@
-from typing import Optional, Dict
+import hashlib
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from Melodie import Scenario
+import numpy as np
 import pandas as pd
+from models.render.instrumentation import RenderDictStats
+from models.render.precision import get_profile_dtype
+from models.render.render_dict import DenseRenderDict
+from models.render.render_dict import ProfileRenderDict
 from models.render.render_dict import RenderDict
-from models.render.render_key import RenderKey
+from models.render.render_dict import convert_id_region
+from models.render.scenario_bundle import get_scenario_bundle_path
+from models.render.scenario_bundle import read_scenario_bundle
+from models.render.scenario_bundle import read_scenario_bundle_info
+from models.render.scenario_bundle import write_scenario_bundle
+from models.render.shared_tables import SHARED_LOADERS
+from models.render.shared_tables import SHARED_TABLE_VERSION
+from models.render.shared_tables import SHARED_TABLES_ENV
+from models.render.shared_tables import SharedTableStore
 from utils.logger import get_logger
 from utils.decorators import load_timer
+from utils.input_cache import get_input_cache_dir, get_source_stat, is_cache_fresh, read_dataframe_cached, update_cache
 
 log = get_logger(__name__)
 
+# scenario attributes read by the setup of the derived tables (with the `id_scenario_*` filters and the national region),
+# the other attributes are not hashed, so that the tables are shared by the scenarios of different regions, see `setup_cached_tables`
+DERIVED_TABLE_PARAMETERS = ["start_year", "end_year"]
+# increase when the setup of the derived tables changes, so that the cached tables are not used anymore
+DERIVED_TABLE_VERSION = 1
+
 
 class RenderScenario(Scenario):
     start_year: int
     end_year: int
+    # input tables of the scenario: {loader method: {attribute name: (file name, loader kwargs)}}
+    framework_tables: Dict[str, Dict[str, Tuple[str, dict]]] = {
+        "load_id": {
+            "regions": ("ID_Region.xlsx", {"id_filter": {"region_level": 3}}),
+            "sectors": ("ID_Sector.xlsx", {}),
+            "subsectors": ("ID_SubSector.xlsx", {}),
+            "energy_carriers": ("ID_EnergyCarrier.xlsx", {}),
+        },
+        "load_relation": {
+            "r_sector_subsector": ("Relation_Sector_SubSector.xlsx", {}),
+        },
+        "load_scenario": {
+            "s_emission_factor": ("Scenario_EnergyCarrier_EmissionFactor.xlsx", {"scenario_filter": "id_scenario_energy_emission_factor", "all_years": True}),
+            "s_energy_carrier_price_wholesale": ("Scenario_EnergyCarrier_Price_Wholesale.xlsx", {"scenario_filter": "id_scenario_energy_price_wholesale", "all_years": True}),
+            "s_energy_carrier_price_tax_rate": ("Scenario_EnergyCarrier_Price_TaxRate.xlsx", {"scenario_filter": "id_scenario_energy_price_tax_rate", "all_years": True}),
+            "s_energy_carrier_price_markup": ("Scenario_EnergyCarrier_Price_MarkUp.xlsx", {"scenario_filter": "id_scenario_energy_price_mark_up", "all_years": True}),
+            "s_energy_carrier_price_co2_emission": ("Scenario_EnergyCarrier_Price_CO2Emission.xlsx", {"scenario_filter": "id_scenario_energy_price_co2_emission", "all_years": True}),
+        },
+    }
+    input_tables: Dict[str, Dict[str, Tuple[str, dict]]] = {}
+
+    def __getattr__(self, name: str):
+        # only called if the attribute is not set yet: the declared tables are loaded on first access,
+        # e.g., the tables in `get_lazy_tables`, which are not loaded by `load_input_data`
+        task = self.get_declared_tables().get(name)
+        if task is None or self.__dict__.get("manager") is None:
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+        self.load_tables([task], workers=1)
+        self.__dict__.setdefault("loaded_tables", {})[name] = "on access"
+        table = self.__dict__[name]
+        render_dict_stats = self.__dict__.get("render_dict_stats")
+        if render_dict_stats is not None and isinstance(table, RenderDict):
+            render_dict_stats.instrument_rdict(name, table)
+        return table
+
+    def load_dataframe(self, file_name: str) -> pd.DataFrame:
+        # DataFrames already read by `load_tables` are shared by the tables loaded from the same file
+        input_dataframes = self.__dict__.get("_input_dataframes")
+        if input_dataframes is not None and file_name in input_dataframes:
+            return input_dataframes[file_name]
+        # input tables are read through the binary input cache (see `utils.input_cache`) instead of parsing xlsx files
+        config = self.manager.config
+        return read_dataframe_cached(
+            file_path=os.path.join(config.input_folder, file_name),
+            cache_dir=get_input_cache_dir(config)
+        )
 
     @load_timer()
     def load_id(self, file_name: str, id_filter: Optional[dict] = None) -> RenderDict:
@@ -55,7 +127,7 @@ class RenderScenario(Scenario):
             scenario_filter: Optional[str] = None,
             all_years: Optional[bool] = False,
             region_level: Optional[int] = None,
-    ) -> RenderDict:
+    ) -> DenseRenderDict:
         df = self.load_dataframe(file_name)
         if scenario_filter is not None:
             df = df.loc[df["id_scenario"] == self.__dict__[scenario_filter]]
@@ -68,14 +140,7 @@ class RenderScenario(Scenario):
             df_index_cols = df[[col for col in df.columns if col.startswith(("id_", "unit"))]]
             df_data_cols = df.loc[:, str(self.start_year):str(min(self.end_year, int(df.columns[-1])))]
             df = pd.concat([df_index_cols, df_data_cols], axis=1)
-        rdict = RenderDict.from_dataframe(
-            tdict_type="Data",
-            df=df,
-            time_column_name="year",
-        )
-        if region_level is not None:
-            rdict.region_level = region_level
-        return rdict
+        return DenseRenderDict.from_year_dataframe(df=df, region_level=region_level)
 
     @load_timer()
     def load_profile(
@@ -83,7 +148,7 @@ class RenderScenario(Scenario):
             file_name: str,
             scenario_filter: Optional[str] = None,
             region_level: Optional[int] = None,
-    ) -> RenderDict:
+    ) -> ProfileRenderDict:
         df = self.load_dataframe(file_name)
         if scenario_filter is not None:
             df = df.loc[df["id_scenario"] == self.__dict__[scenario_filter]]
@@ -92,57 +157,279 @@ class RenderScenario(Scenario):
             if "id_scenario" in df.columns:
                 df = df.loc[df["id_scenario"] == df["id_scenario"].unique()[0]]
                 df.loc[:, "id_scenario"] = self.id
-        rdict = RenderDict.from_profile_dataframe(
-            tdict_type="Data",
-            df=df
+        return ProfileRenderDict.from_profile_dataframe(df=df, region_level=region_level)
+
+    def instrument_render_dicts(self) -> RenderDictStats:
+        render_dict_stats = RenderDictStats()
+        for name, value in self.__dict__.items():
+            if isinstance(value, RenderDict):
+                render_dict_stats.instrument_rdict(name, value)
+        return render_dict_stats
+
+    @classmethod
+    def get_table_tasks(cls) -> List[Tuple[str, str, str, dict]]:
+        # the tables do not depend on each other, so they can be loaded in any order
+        tasks = []
+        for tables in (cls.framework_tables, cls.input_tables):
+            for loader, loader_tables in tables.items():
+                for name, (file_name, kwargs) in loader_tables.items():
+                    tasks.append((name, loader, file_name, kwargs))
+        return tasks
+
+    @classmethod
+    def get_declared_tables(cls) -> Dict[str, Tuple[str, str, str, dict]]:
+        if "_declared_tables" not in cls.__dict__:
+            cls._declared_tables = {task[0]: task for task in cls.get_table_tasks()}
+        return cls._declared_tables
+
+    def get_lazy_tables(self) -> Set[str]:
+        # tables that are not used by every configuration: they are not loaded by `load_input_data`, but on first access
+        return set()
+
+    def load_input_data(self, workers: int = 0):
+        lazy_tables = self.get_lazy_tables()
+        tasks = [task for task in self.get_table_tasks() if task[0] not in lazy_tables]
+        self.load_tables(tasks, workers=workers)
+        self.loaded_tables = {task[0]: "preloaded" for task in tasks}
+        self.setup_derived_tables()
+
+    def get_derived_table_names(self) -> List[str]:
+        return ["s_final_energy_carrier_price"]
+
+    def setup_derived_tables(self):
+        self.setup_cached_tables(["s_final_energy_carrier_price"], self.setup_final_energy_carrier_price)
+
+    def compile_bundle(self, workers: int = 0) -> str:
+        """
+        Loads all declared tables (including the lazy ones) and sets up the derived tables,
+        then saves them in the scenario bundle, which is opened by `open_bundle` instead of loading the input data.
+        The bundle is not compiled again if it is up to date, e.g., if it was compiled for a scenario of another region.
+        """
+        bundle_path = get_scenario_bundle_path(self.manager.config, self.get_derived_table_hash())
+        if self.is_bundle_current(bundle_path):
+            log.info(f"Scenario bundle --> {bundle_path} is up to date")
+            return bundle_path
+        self.load_tables(self.get_table_tasks(), workers=workers)
+        self.setup_derived_tables()
+        table_names = list(self.get_declared_tables().keys()) + self.get_derived_table_names()
+        write_scenario_bundle(
+            bundle_path,
+            tables={name: getattr(self, name) for name in table_names},
+            info={"id_scenario": self.id, "derived_table_hash": self.get_derived_table_hash()}
         )
-        if region_level is not None:
-            rdict.region_level = region_level
-        return rdict
+        log.info(f"Scenario bundle --> {len(table_names)} tables compiled to {bundle_path}")
+        return bundle_path
+
+    def is_bundle_current(self, bundle_path: str) -> bool:
+        # the bundle is outdated if it was written by another version of the bundle format,
+        # or if the scenario parameters or input tables have changed since it was compiled
+        info = read_scenario_bundle_info(bundle_path)
+        return info is not None and info["derived_table_hash"] == self.get_derived_table_hash()
+
+    def open_bundle(self) -> bool:
+        bundle_path = get_scenario_bundle_path(self.manager.config, self.get_derived_table_hash())
+        if not os.path.exists(bundle_path):
+            return False
+        if not self.is_bundle_current(bundle_path):
+            log.warning(f"Scenario bundle --> {bundle_path} is outdated and not used, please compile it again.")
+            return False
+        tables = read_scenario_bundle(bundle_path, id_scenario=self.id)
+        for name, table in tables.items():
+            setattr(self, name, table)
+        self.loaded_tables = {name: "bundle" for name in self.get_declared_tables()}
+        log.info(f"Scenario bundle --> {len(tables)} tables opened from {bundle_path}")
+        return True
+
+    def get_derived_table_hash(self) -> str:
+        # the scenario parameters read by the derived tables (with the national id of the region) and the ids of all input tables
+        if "_derived_table_hash" not in self.__dict__:
+            parameters = {
+                name: value for name, value in self.__dict__.items()
+                if name in DERIVED_TABLE_PARAMETERS or name.startswith("id_scenario_")
+            }
+            if "id_region" in self.__dict__:
+                parameters["id_region_national"] = convert_id_region(int(self.id_region), 0)
+            table_ids = [self.get_table_id(task) for task in self.get_table_tasks()]
+            self._derived_table_hash = hashlib.md5(
+                repr((DERIVED_TABLE_VERSION, sorted(parameters.items()), table_ids)).encode()
+            ).hexdigest()
+        return self._derived_table_hash
+
+    def setup_cached_tables(self, table_names: List[str], setup: Callable[[], None]):
+        """
+        For tables that are identical for the scenarios of all regions (e.g., with region_level=0),
+        the tables created by `setup` are saved in the temp folder and loaded by the later scenarios
+        with the same parameters and input tables instead of running `setup` again.
+        """
+        config = self.manager.config
+        cache_path = os.path.join(
+            config.project_root, config.temp_folder, "cache", "derived_tables",
+            f"{setup.__name__}.{self.get_derived_table_hash()}.pkl"
+        )
+        tables = self.read_cached_tables(cache_path)
+        if tables is not None:
+            for name, table in tables.items():
+                # the tables are saved with the id of the scenario that created them
+                table.set_key_id("id_scenario", self.id)
+                setattr(self, name, table)
+            log.info(f"Derived tables --> {setup.__name__} loaded from {cache_path}")
+            return
+        setup()
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump({name: getattr(self, name) for name in table_names}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+
+    @staticmethod
+    def read_cached_tables(cache_path: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            log.warning(f"Derived tables --> {cache_path} is broken and will be recalculated")
+            return None
+
+    def get_table_report(self) -> pd.DataFrame:
+        loaded_tables = self.__dict__.get("loaded_tables", {})
+        return pd.DataFrame(
+            [[name, loader, file_name, loaded_tables.get(name, "not loaded")] for name, loader, file_name, _ in self.get_table_tasks()],
+            columns=["table", "loader", "file", "status"]
+        )
+
+    def log_table_report(self):
+        df = self.get_table_report()
+        tables = {status: df.loc[df["status"] == status, "table"].to_list() for status in ["preloaded", "bundle", "on access", "not loaded"]}
+        log.info(
+            f"Input tables --> {len(tables['preloaded'])} preloaded, {len(tables['bundle'])} from the scenario bundle, "
+            f"{len(tables['on access'])} loaded on access, "
+            f"{len(tables['not loaded'])} not loaded\n"
+            f"loaded on access: {tables['on access']}\n"
+            f"not loaded: {tables['not loaded']}"
+        )
+
+    def load_tables(self, tasks: List[Tuple[str, str, str, dict]], workers: int = 0):
+        """
+        The tables are grouped by file and loaded on a thread pool (largest files first), so that every file is read only once
+        and the loading time is bounded by the largest files. Before, the source files without a valid input cache are parsed
+        on a process pool, see `prefetch_input_files`. workers --> 0: one worker per cpu core; 1: sequential loading.
+        """
+        workers = workers if workers > 0 else os.cpu_count()
+        tasks = self.attach_shared_tables(tasks)
+        file_tasks: Dict[str, List[Tuple[str, str, str, dict]]] = {}
+        for task in tasks:
+            file_tasks.setdefault(task[2], []).append(task)
+        file_names = sorted(file_tasks.keys(), key=self.get_input_file_size, reverse=True)
+        self.prefetch_input_files(file_names, workers)
+
+        def load_file_tables(file_name: str) -> List[Tuple[str, Any]]:
+            self._input_dataframes[file_name] = self.load_dataframe(file_name)
+            file_tables = [(name, getattr(self, loader)(file_name, **kwargs)) for name, loader, _, kwargs in file_tasks[file_name]]
+            del self._input_dataframes[file_name]
+            return file_tables
+
+        self._input_dataframes = {}
+        try:
+            if workers == 1:
+                loaded = [load_file_tables(file_name) for file_name in file_names]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    loaded = list(pool.map(load_file_tables, file_names))
+        finally:
+            del self._input_dataframes
+        tables = dict(table for file_tables in loaded for table in file_tables)
+        for name, _, _, _ in tasks:
+            setattr(self, name, tables[name])
+
+    def get_table_id(self, task: Tuple[str, str, str, dict]) -> str:
+        # the tables of different scenarios are identical if they are loaded from the same file with the same filters
+        _, loader, file_name, kwargs = task
+        kwargs = dict(kwargs)
+        if kwargs.get("scenario_filter") is not None:
+            kwargs["scenario_filter"] = (kwargs["scenario_filter"], self.__dict__[kwargs["scenario_filter"]])
+        table_info = (
+            loader,
+            file_name,
+            sorted(kwargs.items()),
+            get_source_stat(os.path.join(self.manager.config.input_folder, file_name)),
+            self.start_year,
+            self.end_year,
+            np.dtype(get_profile_dtype()).name,
+            SHARED_TABLE_VERSION,
+        )
+        return hashlib.md5(repr(table_info).encode()).hexdigest()
 
-    def load_framework(self):
-        self.regions = self.load_id("ID_Region.xlsx", id_filter={"region_level": 3})
-        self.sectors = self.load_id("ID_Sector.xlsx")
-        self.subsectors = self.load_id("ID_SubSector.xlsx")
-        self.energy_carriers = self.load_id("ID_EnergyCarrier.xlsx")
-        self.r_sector_subsector = self.load_relation("Relation_Sector_SubSector.xlsx")
-        self.s_emission_factor = self.load_scenario("Scenario_EnergyCarrier_EmissionFactor.xlsx", scenario_filter="id_scenario_energy_emission_factor", all_years=True)
-        self.s_energy_carrier_price_wholesale = self.load_scenario("Scenario_EnergyCarrier_Price_Wholesale.xlsx", scenario_filter="id_scenario_energy_price_wholesale", all_years=True)
-        self.s_energy_carrier_price_tax_rate = self.load_scenario("Scenario_EnergyCarrier_Price_TaxRate.xlsx", scenario_filter="id_scenario_energy_price_tax_rate", all_years=True)
-        self.s_energy_carrier_price_markup = self.load_scenario("Scenario_EnergyCarrier_Price_MarkUp.xlsx", scenario_filter="id_scenario_energy_price_mark_up", all_years=True)
-        self.s_energy_carrier_price_co2_emission = self.load_scenario("Scenario_EnergyCarrier_Price_CO2Emission.xlsx", scenario_filter="id_scenario_energy_price_co2_emission", all_years=True)
-        self.setup_final_energy_carrier_price()
+    def attach_shared_tables(self, tasks: List[Tuple[str, str, str, dict]]) -> List[Tuple[str, str, str, dict]]:
+        # in the worker processes of a parallel run, the tables saved by `share_tables` are mapped from the shared table store,
+        # and the remaining tasks are returned to be loaded by the worker
+        store_dir = os.environ.get(SHARED_TABLES_ENV)
+        if store_dir is None or not os.path.exists(store_dir):
+            return tasks
+        store = SharedTableStore(store_dir)
+        remaining_tasks = []
+        for task in tasks:
+            table = store.load_table(self.get_table_id(task), self.id) if task[1] in SHARED_LOADERS else None
+            if table is None:
+                remaining_tasks.append(task)
+            else:
+                setattr(self, task[0], table)
+        if len(remaining_tasks) < len(tasks):
+            log.info(f"Shared tables --> {len(tasks) - len(remaining_tasks)} tables attached from {store.store_dir}")
+        return remaining_tasks
+
+    def share_tables(self, store: SharedTableStore):
+        lazy_tables = self.get_lazy_tables()
+        for task in self.get_table_tasks():
+            name, loader, file_name, kwargs = task
+            if loader in SHARED_LOADERS and name not in lazy_tables:
+                table_id = self.get_table_id(task)
+                if not store.has_table(table_id):
+                    store.save_table(table_id, getattr(self, loader)(file_name, **kwargs))
+
+    def get_input_file_size(self, file_name: str) -> int:
+        return os.path.getsize(os.path.join(self.manager.config.input_folder, file_name))
+
+    def prefetch_input_files(self, file_names: List[str], workers: int):
+        # parsing xlsx files is cpu-bound, so the files are parsed on a process pool and written to the input cache,
+        # from which they are read by the main process.
+        # In the worker processes of a parallel run (daemonic), the files are parsed by the loading threads instead.
+        config = self.manager.config
+        cache_dir = get_input_cache_dir(config)
+        file_paths = [os.path.join(config.input_folder, file_name) for file_name in file_names]
+        stale_file_paths = [file_path for file_path in file_paths if not is_cache_fresh(file_path, cache_dir)]
+        if len(stale_file_paths) > 1 and workers > 1 and not multiprocessing.current_process().daemon:
+            with ProcessPoolExecutor(max_workers=min(workers, len(stale_file_paths))) as pool:
+                for file_path in pool.map(update_cache, stale_file_paths, [cache_dir] * len(stale_file_paths)):
+                    log.info(f"input cache updated --> {os.path.basename(file_path)}")
 
     def setup_final_energy_carrier_price(self):
-        self.s_final_energy_carrier_price = RenderDict.create_empty_data_tdict(key_cols=[
-            "id_scenario",
-            "id_region",
-            "id_sector",
-            "id_energy_carrier",
-            "year"
-        ])
-        self.s_final_energy_carrier_price.region_level = 0
-        markup = self.load_dataframe("Scenario_EnergyCarrier_Price_MarkUp.xlsx")
         # markup table has the most detailed index columns and can cover the possible rkeys in other tables:
-        # wholesale, tax_rate, and co2_emission
-        for index, row in markup.iterrows():
-            for year in range(self.start_year, self.end_year + 2):
-                # self.end_year + 2 --> until 2051, for updating total energy cost in the last year
-                rkey = RenderKey(id_scenario=self.id).from_dict({
-                    "id_region": row["id_region"],
-                    "id_sector": row["id_sector"],
-                    "id_energy_carrier": row["id_energy_carrier"],
-                    "year": year
-                })
-                self.s_final_energy_carrier_price.set_item(
-                    rkey,
-                    (
-                        self.s_energy_carrier_price_wholesale.get_item(rkey) +
-                        self.s_energy_carrier_price_markup.get_item(rkey)
-                    ) *
-                    (1 + self.s_energy_carrier_price_tax_rate.get_item(rkey)) +
-                    (
-                        self.s_energy_carrier_price_co2_emission.get_item(rkey) *
-                        self.s_emission_factor.get_item(rkey)
-                    )
-                )
+        # wholesale, tax_rate, and co2_emission. The prices of all its keys and years are calculated in one pass.
+        key_cols = ["id_scenario", "id_region", "id_sector", "id_energy_carrier"]
+        index, _ = self.s_energy_carrier_price_markup.to_arrays()
+        rows = index[:, [self.s_energy_carrier_price_markup.key_cols.index(col) for col in key_cols]]
+        rows[:, 0] = self.id
+        # self.end_year + 2 --> until 2051, for updating total energy cost in the last year
+        years = np.arange(self.start_year, self.end_year + 2)
+        keys = {col: np.repeat(rows[:, i], len(years)) for i, col in enumerate(key_cols)}
+        keys["year"] = np.tile(years, len(rows))
+        prices = (
+            (
+                self.s_energy_carrier_price_wholesale.get_items(keys) +
+                self.s_energy_carrier_price_markup.get_items(keys)
+            ) *
+            (1 + self.s_energy_carrier_price_tax_rate.get_items(keys)) +
+            (
+                self.s_energy_carrier_price_co2_emission.get_items(keys) *
+                self.s_emission_factor.get_items(keys)
+            )
+        )
+        self.s_final_energy_carrier_price = DenseRenderDict(
+            key_cols=key_cols + ["year"],
+            index={tuple(row): i for i, row in enumerate(rows.tolist())},
+            values=prices.reshape(len(rows), len(years)),
+            start_year=self.start_year,
+            region_level=0
+        )
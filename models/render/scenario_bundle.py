@@ -0,0 +1,93 @@
+import os
+import pickle
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from models.render.render_dict import DenseRenderDict
+from models.render.render_dict import ProfileRenderDict
+from models.render.shared_tables import create_table
+from models.render.shared_tables import get_table_meta
+
+if TYPE_CHECKING:
+    from Melodie import Config
+
+# Compiled scenario bundle: all input and derived tables of a scenario in one file, see `RenderScenario.compile_bundle`.
+# Layout: the index and values arrays of the scenario and profile tables (aligned to BUNDLE_ALIGNMENT bytes),
+# then the pickled bundle info, then the pickled header (array offsets and the other tables, which are small),
+# and finally the offset of the bundle info as 8 bytes. The arrays are mapped from the file copy-on-write when opened.
+# The bundles are named by `RenderScenario.get_derived_table_hash`, so the rows of SimulatorScenarios with the same filters
+# and national region (e.g., the regions of a country) share one bundle, and the id_scenario of the keys is set when opened.
+BUNDLE_VERSION = 1
+BUNDLE_ALIGNMENT = 64
+
+
+def get_scenario_bundle_path(cfg: "Config", derived_table_hash: str) -> str:
+    return os.path.join(cfg.project_root, cfg.temp_folder, "bundles", f"scenario_{derived_table_hash}.bundle")
+
+
+def write_scenario_bundle(bundle_path: str, tables: Dict[str, Any], info: dict):
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    header = {}
+    temp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+
+        def write_array(array: np.ndarray) -> Tuple[int, str, tuple]:
+            array = np.ascontiguousarray(array)
+            f.write(b"\0" * (-f.tell() % BUNDLE_ALIGNMENT))
+            offset = f.tell()
+            f.write(array.tobytes())
+            return offset, array.dtype.str, array.shape
+
+        for name, table in tables.items():
+            if isinstance(table, (DenseRenderDict, ProfileRenderDict)):
+                index, values = table.to_arrays()
+                header[name] = ("arrays", get_table_meta(table), write_array(index), write_array(values))
+            else:
+                header[name] = ("object", table)
+        info_offset = f.tell()
+        pickle.dump({"version": BUNDLE_VERSION, **info}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(info_offset.to_bytes(8, "little"))
+    os.replace(temp_path, bundle_path)
+
+
+def read_scenario_bundle_info(bundle_path: str) -> Optional[dict]:
+    # None if the bundle does not exist, is broken, or was written by another version of the bundle format
+    if not os.path.exists(bundle_path):
+        return None
+    try:
+        with open(bundle_path, "rb") as f:
+            f.seek(-8, os.SEEK_END)
+            f.seek(int.from_bytes(f.read(8), "little"))
+            info = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(info, dict) or info.get("version") != BUNDLE_VERSION:
+        return None
+    return info
+
+
+def read_scenario_bundle(bundle_path: str, id_scenario: int) -> Dict[str, Any]:
+    with open(bundle_path, "rb") as f:
+        f.seek(-8, os.SEEK_END)
+        f.seek(int.from_bytes(f.read(8), "little"))
+        pickle.load(f)
+        header = pickle.load(f)
+    buffer = np.memmap(bundle_path, dtype=np.uint8, mode="c")
+
+    def read_array(offset: int, dtype: str, shape: tuple) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        return np.asarray(buffer[offset:offset + dtype.itemsize * int(np.prod(shape))]).view(dtype).reshape(shape)
+
+    tables = {}
+    for name, entry in header.items():
+        if entry[0] == "arrays":
+            _, meta, index_spec, values_spec = entry
+            tables[name] = create_table(meta, read_array(*index_spec), read_array(*values_spec), id_scenario=id_scenario)
+        else:
+            table = entry[1]
+            if hasattr(table, "set_key_id"):
+                table.set_key_id("id_scenario", id_scenario)
+            tables[name] = table
+    return tables
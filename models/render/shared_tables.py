@@ -0,0 +1,128 @@
+import os
+import pickle
+import shutil
+from typing import Optional, TYPE_CHECKING, Union
+
+import numpy as np
+
+from models.render.render_dict import DenseRenderDict
+from models.render.render_dict import ProfileRenderDict
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from Melodie import Config
+    from Melodie import Simulator
+
+log = get_logger(__name__)
+
+# Memory-mapped store of the scenario and profile tables for the parallel runs (see `run_building_model`).
+# The tables are loaded once by the main process and saved as .npy files. The worker processes map them
+# copy-on-write instead of loading their own copy, so that the pages are shared by all workers.
+# The small id, relation and parameter tables are still loaded by each worker.
+# The store is only attached while SHARED_TABLES_ENV is set, i.e., during the parallel run (see `share_scenario_tables`),
+# and removed afterwards by `unshare_scenario_tables`.
+SHARED_LOADERS = ["load_scenario", "load_profile"]
+SHARED_TABLES_ENV = "RENDER_SHARED_TABLES"
+# increase when the loaders or the saved format change, so that the tables saved before are not attached anymore
+SHARED_TABLE_VERSION = 1
+
+
+def get_shared_table_dir(cfg: "Config") -> str:
+    return os.path.join(cfg.project_root, cfg.temp_folder, "cache", "shared_tables")
+
+
+def get_table_meta(rdict: Union[DenseRenderDict, ProfileRenderDict]) -> dict:
+    return {
+        "type": "dense" if isinstance(rdict, DenseRenderDict) else "profile",
+        "key_cols": rdict.key_cols,
+        "start_year": rdict.start_year if isinstance(rdict, DenseRenderDict) else None,
+        "region_level": rdict.region_level,
+    }
+
+
+def create_table(
+        meta: dict,
+        index: np.ndarray,
+        values: np.ndarray,
+        id_scenario: Optional[int] = None
+) -> Union[DenseRenderDict, ProfileRenderDict]:
+    # inverse of `get_table_meta` and `to_arrays`, the values array is used without copying
+    index_cols = meta["key_cols"][:-1] if meta["type"] == "dense" else meta["key_cols"]
+    index = np.array(index)
+    if id_scenario is not None and "id_scenario" in index_cols:
+        # the tables are shared by the scenarios with the same filters, but their keys use the id of each scenario
+        index[:, index_cols.index("id_scenario")] = id_scenario
+    index = {tuple(row[:-1]): row[-1] for row in index.tolist()}
+    if meta["type"] == "dense":
+        return DenseRenderDict(
+            key_cols=meta["key_cols"],
+            index=index,
+            values=values,
+            start_year=meta["start_year"],
+            region_level=meta["region_level"]
+        )
+    return ProfileRenderDict(
+        key_cols=meta["key_cols"],
+        index=index,
+        values=values,
+        region_level=meta["region_level"]
+    )
+
+
+class SharedTableStore:
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+
+    def get_table_path(self, table_id: str, suffix: str) -> str:
+        return os.path.join(self.store_dir, f"{table_id}.{suffix}")
+
+    def has_table(self, table_id: str) -> bool:
+        # the meta file is written last, so a table is only found after it is completely written
+        return os.path.exists(self.get_table_path(table_id, "meta.pkl"))
+
+    def clear(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def save_table(self, table_id: str, rdict: Union[DenseRenderDict, ProfileRenderDict]):
+        os.makedirs(self.store_dir, exist_ok=True)
+        index, values = rdict.to_arrays()
+        meta = get_table_meta(rdict)
+        for suffix, array in [("index.npy", index), ("values.npy", values)]:
+            temp_path = self.get_table_path(table_id, f"{os.getpid()}.tmp")
+            with open(temp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(temp_path, self.get_table_path(table_id, suffix))
+        temp_path = self.get_table_path(table_id, f"{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.get_table_path(table_id, "meta.pkl"))
+
+    def load_table(self, table_id: str, id_scenario: int) -> Optional[Union[DenseRenderDict, ProfileRenderDict]]:
+        if not self.has_table(table_id):
+            return None
+        with open(self.get_table_path(table_id, "meta.pkl"), "rb") as f:
+            meta = pickle.load(f)
+        index = np.load(self.get_table_path(table_id, "index.npy"))
+        # copy-on-write: the pages are shared until a worker writes to them, e.g., by `DenseRenderDict.set_item`
+        values = np.asarray(np.load(self.get_table_path(table_id, "values.npy"), mmap_mode="c"))
+        return create_table(meta, index, values, id_scenario=id_scenario)
+
+
+def share_scenario_tables(simulator: "Simulator"):
+    # called by the main process before the parallel run: the scenarios are generated as in the worker processes
+    # and every distinct table is loaded and saved once
+    simulator.subworker_prerun()
+    store = SharedTableStore(get_shared_table_dir(simulator.config))
+    store.clear()
+    for scenario in simulator.scenarios:
+        scenario.share_tables(store)
+    log.info(f"Shared tables --> {len(os.listdir(store.store_dir)) // 3 if os.path.exists(store.store_dir) else 0} tables saved in {store.store_dir}")
+    # inherited by the worker processes started afterwards
+    os.environ[SHARED_TABLES_ENV] = store.store_dir
+
+
+def unshare_scenario_tables(cfg: "Config"):
+    # called by the main process after the parallel run, so that later runs load their own tables
+    os.environ.pop(SHARED_TABLES_ENV, None)
+    SharedTableStore(get_shared_table_dir(cfg)).clear()
@@ -4,10 +4,11 @@ from typing import TYPE_CHECKING, List, Optional, Dict
 import numpy as np
 from Melodie import Agent
 
+from models.render.precision import get_profile_dtype, sum_profile
 from models.render_building import cons
 from models.render_building.building_component import BuildingComponent
 from models.render_building.building_key import BuildingKey
-from models.render_building.building_r5c1 import R5C1, spec
+from models.render_building.building_r5c1 import conduct_r5c1_batch, R5C1Input, RepresentativeDays
 from models.render_building.building_unit import Unit
 from models.render_building.tech_cooling import CoolingSystem
 from models.render_building.tech_heating import HeatingSystem, HeatingTechnology
@@ -21,7 +22,17 @@ if TYPE_CHECKING:
 
 
 def create_empty_arr():
-    return np.zeros((8760, ))
+    return np.zeros((8760, ), dtype=get_profile_dtype())
+
+
+def create_constant_arr(value: float):
+    arr = np.full((8760, ), value, dtype=np.float64)
+    arr.setflags(write=False)
+    return arr
+
+
+SET_TEMPERATURE_MIN_NORM = create_constant_arr(20)
+SET_TEMPERATURE_MAX_NORM = create_constant_arr(27)
 
 
 class Building(Agent):
@@ -42,6 +53,16 @@ class Building(Agent):
         self.exists = True
         self.mandatory_renovation_year = cons.MANDATORY_RENOVATION_YEAR_DEFAULT
         self.mandatory_heating_system_modernization_year = cons.MANDATORY_HEATING_SYSTEM_MODERNIZATION_YEAR_DEFAULT
+        # generator of the set temperature profiles, created when they are first drawn, see `get_set_temperature_profiles`
+        self.rng: Optional[np.random.Generator] = None
+        # change tracking: r5c1 and final energy demand are only recalculated when their inputs changed
+        self.r5c1_outdated = True
+        self.final_energy_demand_outdated = True
+        # results of r5c1 under norm condition: {(weather year, component states): (heating_demand_norm, cooling_demand_norm)}
+        self.r5c1_norm_results: Dict[tuple, tuple] = {}
+        # set temperature profiles of the building under real condition and their set points, see `get_set_temperature_profiles`
+        self.set_temperature_profiles_key: Optional[tuple] = None
+        self.set_temperature_profiles: Optional[tuple] = None
 
     def init_rkey(self):
         self.rkey = BuildingKey(
@@ -131,10 +152,10 @@ class Building(Agent):
 
         self.occupancy_profile = sum_unit_profile("occupancy_profile") / self.unit_number
         self.appliance_electricity_profile = sum_unit_profile("appliance_electricity_profile")
-        self.appliance_electricity_demand = self.appliance_electricity_profile.sum()
+        self.appliance_electricity_demand = sum_profile(self.appliance_electricity_profile)
         self.appliance_electricity_demand_per_person = self.appliance_electricity_demand / self.population
         self.hot_water_profile = sum_unit_profile("hot_water_profile")
-        self.hot_water_demand = self.hot_water_profile.sum()
+        self.hot_water_demand = sum_profile(self.hot_water_profile)
         self.hot_water_demand_per_person = self.hot_water_demand / self.population
 
     def init_building_size(self):
@@ -357,29 +378,88 @@ class Building(Agent):
     """
 
     def calc_building_heating_cooling_demand(self):
-        self.init_building_efficiency_class()
+        r5c1_norm_result = self.get_r5c1_norm_result()
+        if r5c1_norm_result is None:
+            self.init_building_efficiency_class()
+        else:
+            self.update_r5c1_params()
+            self.apply_r5c1_norm_result(*r5c1_norm_result)
         self.update_r5c1_temperature()
         self.conduct_r5c1_calculation()
-        self.reality_norm_factor = self.heating_demand_per_m2 / self.heating_demand_per_m2_norm
+        self.update_reality_norm_factor()
+
+    def mark_r5c1_outdated(self):
+        self.r5c1_outdated = True
+        self.final_energy_demand_outdated = True
+
+    def mark_final_energy_demand_outdated(self):
+        self.final_energy_demand_outdated = True
 
     def init_building_efficiency_class(self):
         self.update_r5c1_params()
         self.update_r5c1_temperature(norm=True)
-        self.conduct_r5c1_calculation()
-        self.heating_demand_norm = self.heating_demand
+        self.conduct_r5c1_calculation(norm=True)
+        self.update_building_efficiency_class()
+
+    def update_building_efficiency_class(self):
+        # called right after the r5c1 calculation under norm condition
+        self.set_r5c1_norm_result(self.get_r5c1_norm_key(), self.heating_demand, self.cooling_demand)
+        self.apply_r5c1_norm_result(self.heating_demand, self.cooling_demand)
+
+    def apply_r5c1_norm_result(self, heating_demand_norm: float, cooling_demand_norm: float):
+        self.heating_demand_norm = heating_demand_norm
         self.heating_demand_per_m2_norm = self.heating_demand_norm / self.total_living_area
         self.total_heating_per_m2_norm = self.heating_demand_per_m2_norm + self.hot_water_demand_per_m2
-        self.cooling_demand_norm = self.cooling_demand
-        self.cooling_demand_per_m2_norm = self.cooling_demand_per_m2
+        self.cooling_demand_norm = cooling_demand_norm
+        self.cooling_demand_per_m2_norm = self.cooling_demand_norm / self.total_living_area
         self.assign_building_efficiency_class()
 
+    def get_r5c1_norm_key(self, building_components: Optional[Dict[str, "BuildingComponent"]] = None) -> tuple:
+        # key of the r5c1 result under norm condition: the envelope and the weather profiles.
+        # The internal gains (occupancy, and the appliance profile scaled by p_building_rc_appliance_internal_gain) are
+        # deliberately excluded, so the reused result is an approximation if they change, e.g., with the year.
+        if building_components is None:
+            building_components = self.building_components
+        return (self.adjust_year_for_weather_profiles(self.rkey.year),) + tuple(
+            (component.rkey.id_building_component_option_efficiency_class, component.u_value)
+            for component in building_components.values()
+        )
+
+    def get_r5c1_norm_result(self, building_components: Optional[Dict[str, "BuildingComponent"]] = None) -> Optional[tuple]:
+        return self.r5c1_norm_results.get(self.get_r5c1_norm_key(building_components))
+
+    def set_r5c1_norm_result(self, r5c1_norm_key: tuple, heating_demand_norm: float, cooling_demand_norm: float):
+        # results of previous weather years are not needed anymore
+        if any(key[0] != r5c1_norm_key[0] for key in self.r5c1_norm_results.keys()):
+            self.r5c1_norm_results = {}
+        self.r5c1_norm_results[r5c1_norm_key] = (heating_demand_norm, cooling_demand_norm)
+
+    def update_reality_norm_factor(self):
+        # called at the end of the r5c1 calculations under norm and real condition
+        self.reality_norm_factor = self.heating_demand_per_m2 / self.heating_demand_per_m2_norm
+        self.r5c1_outdated = False
+        self.final_energy_demand_outdated = True
+
     def assign_building_efficiency_class(self):
+        id_building_efficiency_class = self.get_building_efficiency_class(self.heating_demand_per_m2_norm)
+        if id_building_efficiency_class is not None:
+            self.rkey.id_building_efficiency_class = id_building_efficiency_class
+
+    def get_building_efficiency_class(self, heating_demand_per_m2: float) -> Optional[int]:
         for _, row in self.scenario.p_building_efficiency_class_intensity.iterrows():
-            if row["min"] <= self.heating_demand_per_m2 <= row["max"]:
-                self.rkey.id_building_efficiency_class = row["id_building_efficiency_class"]
-                break
+            if row["min"] <= heating_demand_per_m2 <= row["max"]:
+                return row["id_building_efficiency_class"]
+        return None
 
     def update_r5c1_params(self):
+        for param_name, param_value in self.get_r5c1_params().items():
+            setattr(self, param_name, param_value)
+
+    def get_r5c1_params(self, building_components: Optional[Dict[str, "BuildingComponent"]] = None) -> dict:
+        """
+        Side-effect-free calculation of the r5c1 params and gains.
+        building_components: by default, the components of the building; can be replaced by renovated copies.
+        """
 
         def get_infiltration_param(id_window_option_efficiency_class: int):
             if id_window_option_efficiency_class <= 2:
@@ -390,41 +470,45 @@ class Building(Agent):
                 infiltration_param = 0.2
             return infiltration_param
 
+        if building_components is None:
+            building_components = self.building_components
+        params = {}
+
         """
         Losses
         """
         # h_tr_is --> heat transfer coefficient of surface to internal air (equation 9)
         h_is = 3.45  # W/m2K
         a_at = 4.5  # factor, no unit
-        self.a_is = a_at * self.total_living_area  # internal surface area, m2
-        self.h_tr_is = h_is * self.a_is  # W/K
+        params["a_is"] = a_at * self.total_living_area  # internal surface area, m2
+        params["h_tr_is"] = h_is * params["a_is"]  # W/K
         c_m = 45  # heat capacity per square meter (Wh/m2K)
-        self.c_m = c_m * self.a_is  # total heat capacity of the thermal mass
+        params["c_m"] = c_m * params["a_is"]  # total heat capacity of the thermal mass
 
         # h_tr_w --> heat transfer coefficient of glazed elements to external air (equation 18)
-        window = self.building_components["window"]
-        self.h_tr_w = window.area * window.u_value  # W/K
+        window = building_components["window"]
+        params["h_tr_w"] = window.area * window.u_value  # W/K
 
         # h_tr_op --> heat transfer coefficient of opaque elements to external air (equation 18)
         b_tr_wall = 1  # adjustment factor
         b_tr_roof = 1  # adjustment factor
         b_tr_basement = 0.5  # adjustment factor
-        wall = self.building_components["wall"]
-        roof = self.building_components["roof"]
-        basement = self.building_components["basement"]
-        self.h_tr_op = b_tr_wall * wall.area * wall.u_value + \
-                       b_tr_roof * roof.area * roof.u_value + \
-                       b_tr_basement * basement.area * basement.u_value
+        wall = building_components["wall"]
+        roof = building_components["roof"]
+        basement = building_components["basement"]
+        params["h_tr_op"] = b_tr_wall * wall.area * wall.u_value + \
+                            b_tr_roof * roof.area * roof.u_value + \
+                            b_tr_basement * basement.area * basement.u_value
 
         # h_tr_ms --> heat transfer coefficient of effective thermal mass to internal surface (equation 64)
         a_am = 2.5  # factor, no unit
         # effective surface of thermal mass, m2
-        self.a_m = a_am * self.total_living_area
+        params["a_m"] = a_am * self.total_living_area
         h_ms = 9.1  # W/m2K
-        self.h_tr_ms = self.a_m * h_ms  # W/K
+        params["h_tr_ms"] = params["a_m"] * h_ms  # W/K
 
         # h_tr_em --> heat transfer coefficient of thermal mass to external air (equation 63)
-        self.h_tr_em = 1 / (1 / self.h_tr_op - 1 / self.h_tr_ms)
+        params["h_tr_em"] = 1 / (1 / params["h_tr_op"] - 1 / params["h_tr_ms"])
 
         # h_ve_adj --> heat transfer coefficient of ventilation to external air (equation 21)
         pho_a_c = 1200 / 3600  # Wh/m3K
@@ -432,12 +516,12 @@ class Building(Agent):
         q_ve_inf = get_infiltration_param(window.rkey.id_building_component_option_efficiency_class)  # air flow rate due to infiltration (unit: 1/hour)
         q_ve_ven = 0.4  # air flow rate due to ventilation (unit: 1/hour)
         h = 2.5  # height per storey (unit: m)
-        self.h_vent_adj = pho_a_c * b_ve_k * (q_ve_inf + q_ve_ven) * self.total_living_area * h
+        params["h_vent_adj"] = pho_a_c * b_ve_k * (q_ve_inf + q_ve_ven) * self.total_living_area * h
 
         # h_tr_1, h_tr_2, h_tr_3 --> intermediate variables in the equation
-        self.h_tr_1 = 1 / ((1 / self.h_vent_adj) + (1 / self.h_tr_is))
-        self.h_tr_2 = self.h_tr_1 + self.h_tr_w
-        self.h_tr_3 = 1 / ((1 / self.h_tr_2) + (1 / self.h_tr_ms))
+        params["h_tr_1"] = 1 / ((1 / params["h_vent_adj"]) + (1 / params["h_tr_is"]))
+        params["h_tr_2"] = params["h_tr_1"] + params["h_tr_w"]
+        params["h_tr_3"] = 1 / ((1 / params["h_tr_2"]) + (1 / params["h_tr_ms"]))
 
         """
         Gains
@@ -445,13 +529,15 @@ class Building(Agent):
         # 1. internal gains
         # 1.1 internal gains through occupancy
         phi_occ = 80  # W per person  (number of person from units)
-        self.internal_gain_occ = phi_occ * self.occupancy_profile * self.population
+        params["internal_gain_occ"] = phi_occ * self.occupancy_profile * self.population
 
         # 1.2 internal gains through appliance
-        self.internal_gain_app = self.appliance_electricity_profile * \
-                                 self.scenario.p_building_rc_appliance_internal_gain.get_item(self.rkey)
+        params["internal_gain_app"] = self.appliance_electricity_profile * \
+                                      self.scenario.p_building_rc_appliance_internal_gain.get_item(self.rkey)
 
         # 2. solar gains
+        weather_profiles = self.get_weather_profiles(self.rkey)
+
         # 2.1 opaque gains
 
         def get_opaque_effective_area(component_name: str) -> float:
@@ -459,7 +545,7 @@ class Building(Agent):
             absorption_coefficient = 0.75
             # surface thermal resistence of the opaque part (m2K/W)
             resistance_coefficient = 0.04
-            component = self.building_components[component_name]
+            component = building_components[component_name]
             return component.area * component.u_value * resistance_coefficient * shading_factor * absorption_coefficient
 
         def get_opaque_sky_reflection_profile(component_name: str) -> np.ndarray:
@@ -468,111 +554,143 @@ class Building(Agent):
             resistance_coefficient = 0.04
             # average temperature difference between ambient air and sky (°C)
             temp_diff = 11
-            epsilon = 0.9  # emissivity of the thermal radiation of the outer surface
-            # Stefan-Boltzmann constant: σ = 5.67 × 10-8 W/(m2⋅K4)
-            sigma = 5.67 * 10 ** (-8)
-            outside_temperature = self.get_weather_temperature_profile(self.rkey)
-            # external radiant heat transfer coefficient
-            h_r = 4 * epsilon * sigma * ((outside_temperature + 273.15) ** 3)
-            component = self.building_components[component_name]
-            return component.area * component.u_value * resistance_coefficient * temp_diff * form_param[component_name] * h_r
-
-        total_radiation = create_empty_arr()
-        rkey = self.rkey.make_copy()
-        for id_orientation in self.scenario.orientations.keys():
-            rkey.id_orientation = id_orientation
-            total_radiation += self.get_weather_radiation_profile(rkey)
+            component = building_components[component_name]
+            # external radiant heat transfer coefficient (h_r) is calculated by the scenario
+            return component.area * component.u_value * resistance_coefficient * temp_diff * form_param[component_name] * weather_profiles["h_r"]
 
-        self.solar_gain_opa = create_empty_arr()
+        params["solar_gain_opa"] = create_empty_arr()
         for component_name in ["roof", "wall"]:
-            self.solar_gain_opa += total_radiation * get_opaque_effective_area(component_name) - \
-                                   get_opaque_sky_reflection_profile(component_name)
+            params["solar_gain_opa"] += weather_profiles["total_radiation"] * get_opaque_effective_area(component_name) - \
+                                        get_opaque_sky_reflection_profile(component_name)
 
         # 2.2 glazing gains
         transmittance_factor = 0.7  # solar transmittance of glass
         shading_factor = 0.6  # shading factor
         frame_share = 0.3  # share of frame area
         correction_param = 0.9  # correction factor
-        self.solar_gain_gla = create_empty_arr()
+        params["solar_gain_gla"] = create_empty_arr()
         rkey = self.rkey.make_copy()
-        for id_orientation in self.scenario.orientations.keys():
+        for id_orientation, radiation in weather_profiles["radiation"].items():
             rkey.id_orientation = id_orientation
-            self.solar_gain_gla += correction_param * transmittance_factor * shading_factor * (1 - frame_share) * \
-                                   self.get_weather_radiation_profile(rkey) * \
-                                   self.scenario.p_building_envelope_window_area_orientation.get_item(rkey)
+            params["solar_gain_gla"] += correction_param * transmittance_factor * shading_factor * (1 - frame_share) * \
+                                        radiation * \
+                                        self.scenario.p_building_envelope_window_area_orientation.get_item(rkey)
 
         # gains in total
-        self.internal_gain = self.internal_gain_occ + self.internal_gain_app
-        self.solar_gain = self.solar_gain_opa + self.solar_gain_gla
+        params["internal_gain"] = params["internal_gain_occ"] + params["internal_gain_app"]
+        params["solar_gain"] = params["solar_gain_opa"] + params["solar_gain_gla"]
+        params["total_living_area"] = self.total_living_area
+        return params
 
     def update_r5c1_temperature(self, norm: Optional[bool] = False):
         self.weather_temperature = self.get_weather_temperature_profile(self.rkey)
-        if self.rkey.id_building_efficiency_class is None or norm:
-            self.set_temperature_min = np.ones((8760,)) * 20
-            self.set_temperature_max = np.ones((8760,)) * 27
-        else:
+        if self.rkey.id_building_efficiency_class is not None and not norm:
             self.set_temperature_occupied_min = self.scenario.p_set_temperature_occupied_min.get_item(self.rkey)
             self.set_temperature_occupied_max = self.scenario.p_set_temperature_occupied_max.get_item(self.rkey)
             self.set_temperature_empty_min = self.scenario.p_set_temperature_empty_min.get_item(self.rkey)
             self.set_temperature_empty_max = self.scenario.p_set_temperature_empty_max.get_item(self.rkey)
-            self.set_temperature_min = np.ones((8760,))
-            self.set_temperature_max = np.ones((8760,))
-            # update set_temperature based on occupancy
-            for hour in range(0, 8760):
-                if random.uniform(0, 1) <= self.scenario.optimal_heating_behavior_prob:
-                    self.set_temperature_min[hour] = (self.set_temperature_empty_min +
-                                                      (self.set_temperature_occupied_min - self.set_temperature_empty_min) *
-                                                      self.occupancy_profile[hour])
-                    self.set_temperature_max[hour] = (self.set_temperature_empty_max -
-                                                      (self.set_temperature_empty_max - self.set_temperature_occupied_max)
-                                                      * self.occupancy_profile[hour])
-                else:
-                    self.set_temperature_min[hour] = self.set_temperature_occupied_min
-                    self.set_temperature_max[hour] = self.set_temperature_occupied_max
+        self.set_temperature_min, self.set_temperature_max = self.get_set_temperature_profiles(self.rkey, norm=norm)
+
+    def get_set_temperature_profiles(self, rkey: "BuildingKey", norm: Optional[bool] = False, cache: Optional[bool] = True):
+        """
+        The profiles are read-only and cached on the building until the set points change.
+        With cache=False (e.g., for renovation options), the profiles are drawn without replacing the cached ones.
+        """
+        if rkey.id_building_efficiency_class is None or norm:
+            return SET_TEMPERATURE_MIN_NORM, SET_TEMPERATURE_MAX_NORM
+        set_temperature_occupied_min = self.scenario.p_set_temperature_occupied_min.get_item(rkey)
+        set_temperature_occupied_max = self.scenario.p_set_temperature_occupied_max.get_item(rkey)
+        set_temperature_empty_min = self.scenario.p_set_temperature_empty_min.get_item(rkey)
+        set_temperature_empty_max = self.scenario.p_set_temperature_empty_max.get_item(rkey)
+        key = (
+            set_temperature_occupied_min,
+            set_temperature_occupied_max,
+            set_temperature_empty_min,
+            set_temperature_empty_max,
+            self.scenario.optimal_heating_behavior_prob
+        )
+        if key == self.set_temperature_profiles_key:
+            return self.set_temperature_profiles
+        if self.rng is None:
+            # seeded by the scenario, region and building ids instead of the model's random state, which is not touched
+            self.rng = np.random.default_rng((self.scenario.id, self.rkey.id_region, self.id))
+        # update set_temperature based on occupancy in the hours with optimal heating behavior
+        optimal_heating_behavior = self.rng.random(8760) <= self.scenario.optimal_heating_behavior_prob
+        set_temperature_min = np.where(
+            optimal_heating_behavior,
+            set_temperature_empty_min + (set_temperature_occupied_min - set_temperature_empty_min) * self.occupancy_profile,
+            set_temperature_occupied_min
+        )
+        set_temperature_max = np.where(
+            optimal_heating_behavior,
+            set_temperature_empty_max - (set_temperature_empty_max - set_temperature_occupied_max) * self.occupancy_profile,
+            set_temperature_occupied_max
+        )
+        set_temperature_min.setflags(write=False)
+        set_temperature_max.setflags(write=False)
+        if cache:
+            self.set_temperature_profiles_key = key
+            self.set_temperature_profiles = (set_temperature_min, set_temperature_max)
+        return set_temperature_min, set_temperature_max
+
+    @staticmethod
+    def adjust_year_for_weather_profiles(year: int):
+        if year > 2020:
+            if year <= 2025:
+                year = 2020
+            elif 2025 < year <= 2035:
+                year = 2030
+            elif 2035 < year <= 2045:
+                year = 2040
+            elif 2045 < year:
+                year = 2050
+        return year
 
     @staticmethod
     def adjust_rkey_year_for_weather_profiles(rkey_to_adjust_year: "BuildingKey"):
-        rkey_copy = rkey_to_adjust_year.make_copy()
-        if rkey_copy.year > 2020:
-            if rkey_copy.year <= 2025:
-                rkey_copy.year = 2020
-            elif 2025 < rkey_copy.year <= 2035:
-                rkey_copy.year = 2030
-            elif 2035 < rkey_copy.year <= 2045:
-                rkey_copy.year = 2040
-            elif 2045 < rkey_copy.year:
-                rkey_copy.year = 2050
-        return rkey_copy
+        return rkey_to_adjust_year.with_(year=Building.adjust_year_for_weather_profiles(rkey_to_adjust_year.year))
 
     def get_weather_temperature_profile(self, rkey_to_adjust_year: "BuildingKey"):
         rkey_adjusted = self.adjust_rkey_year_for_weather_profiles(rkey_to_adjust_year)
         return self.scenario.pr_weather_temperature.get_item(rkey_adjusted)
 
-    def get_weather_radiation_profile(self, rkey_to_adjust_year: "BuildingKey"):
+    def get_weather_profiles(self, rkey_to_adjust_year: "BuildingKey") -> dict:
         rkey_adjusted = self.adjust_rkey_year_for_weather_profiles(rkey_to_adjust_year)
-        return self.scenario.pr_weather_radiation.get_item(rkey_adjusted)
-
-    def conduct_r5c1_calculation(self):
+        return self.scenario.get_weather_profiles(rkey_adjusted)
+
+    def get_r5c1_representative_days(self) -> Optional[RepresentativeDays]:
+        if self.scenario.r5c1_representative_days == 0:
+            return None
+        key = (self.rkey.id_region, self.adjust_year_for_weather_profiles(self.rkey.year))
+        if key not in self.scenario.r5c1_representative_days_cache:
+            weather_profiles = self.get_weather_profiles(self.rkey)
+            self.scenario.r5c1_representative_days_cache[key] = RepresentativeDays(
+                weather_temperature=weather_profiles["temperature"],
+                weather_radiation=weather_profiles["total_radiation"],
+                representative_day_number=self.scenario.r5c1_representative_days,
+                warm_up_days=cons.R5C1_REPRESENTATIVE_DAYS_WARM_UP
+            )
+        return self.scenario.r5c1_representative_days_cache[key]
 
-        def inherit_params(empty_r5c1_model: "R5C1"):
-            for attribute, _ in spec:
-                if hasattr(self, attribute):
-                    setattr(empty_r5c1_model, attribute, getattr(self, attribute))
-            return empty_r5c1_model
+    def conduct_r5c1_calculation(self, norm: Optional[bool] = False):
+        heating_demand_profiles, cooling_demand_profiles = conduct_r5c1_batch(
+            [self],
+            cache=self.scenario.r5c1_cache if norm else None,
+            representative_days=self.get_r5c1_representative_days()
+        )
+        self.update_heating_cooling_demand(heating_demand_profiles[0], cooling_demand_profiles[0])
 
-        r5c1_model = inherit_params(R5C1())
-        r5c1_model.update_building_heating_cooling_demand()
-        self.heating_demand_profile: np.ndarray = r5c1_model.heating_demand_profile / 1000  # from Wh to kWh
-        self.heating_demand = self.heating_demand_profile.sum()
+    def update_heating_cooling_demand(self, heating_demand_profile: np.ndarray, cooling_demand_profile: np.ndarray):
+        self.heating_demand_profile: np.ndarray = heating_demand_profile / 1000  # from Wh to kWh
+        self.heating_demand = sum_profile(self.heating_demand_profile)
         self.total_heating_demand_peak = (self.heating_demand_profile + self.hot_water_profile).max()
         self.heating_demand_per_m2 = self.heating_demand / self.total_living_area
         self.total_heating_per_m2 = self.heating_demand_per_m2 + self.hot_water_demand_per_m2
-        self.cooling_demand_profile: np.ndarray = abs(r5c1_model.cooling_demand_profile / 1000)  # from Wh to kWh
-        self.cooling_demand = self.cooling_demand_profile.sum()
+        self.cooling_demand_profile: np.ndarray = abs(cooling_demand_profile / 1000)  # from Wh to kWh
+        self.cooling_demand = sum_profile(self.cooling_demand_profile)
         self.cooling_demand_peak = self.cooling_demand_profile.max()
         self.cooling_demand_per_m2 = self.cooling_demand / self.total_living_area
 
-
     """
     Calculate final energy demand
     """
@@ -601,27 +719,34 @@ class Building(Agent):
             )
 
     def update_space_cooling_final_energy_demand(self):
+        self.final_energy_demand[cons.ID_END_USE_SPACE_COOLING] = self.get_space_cooling_final_energy_demand(self.cooling_demand)
+
+    def get_space_cooling_final_energy_demand(self, cooling_demand: float) -> list:
         if self.cooling_system.is_adopted:
-            self.final_energy_demand[cons.ID_END_USE_SPACE_COOLING] = [
+            return [
                 (
                     self.cooling_system.energy_intensity.id_energy_carrier,
-                    self.cooling_system.energy_intensity.value * abs(self.cooling_demand)
+                    self.cooling_system.energy_intensity.value * abs(cooling_demand)
                 )
             ]
         else:
-            self.final_energy_demand[cons.ID_END_USE_SPACE_COOLING] = []
+            return []
 
     def update_space_heating_final_energy_demand(self):
-        self.final_energy_demand[cons.ID_END_USE_SPACE_HEATING] = []
+        self.final_energy_demand[cons.ID_END_USE_SPACE_HEATING] = self.get_space_heating_final_energy_demand(self.heating_demand)
+
+    def get_space_heating_final_energy_demand(self, heating_demand: float) -> list:
+        space_heating_final_energy_demand = []
         for heating_technology in self.heating_system.heating_technologies:
             if heating_technology is not None:
                 for energy_intensity in heating_technology.space_heating_energy_intensities:
-                    self.final_energy_demand[energy_intensity.id_end_use].append(
+                    space_heating_final_energy_demand.append(
                         (
                             energy_intensity.id_energy_carrier,
-                            energy_intensity.value * self.heating_demand
+                            energy_intensity.value * heating_demand
                         )
                     )
+        return space_heating_final_energy_demand
 
     def update_hot_water_final_energy_demand(self):
         self.final_energy_demand[cons.ID_END_USE_HOT_WATER] = []
@@ -651,11 +776,15 @@ class Building(Agent):
     """
 
     def update_total_energy_cost(self):
-        self.total_energy_cost = 0
-        for _, end_use_energy_intensities in self.final_energy_demand.items():
-            for id_energy_carrier, final_energy_demand in end_use_energy_intensities:
-                rkey = self.rkey.make_copy().set_id({"id_energy_carrier": id_energy_carrier})
-                self.total_energy_cost += final_energy_demand * self.scenario.s_final_energy_carrier_price.get_item(rkey)
+        self.total_energy_cost = self.get_total_energy_cost(self.final_energy_demand, self.rkey)
+
+    def get_total_energy_cost(self, final_energy_demand: dict, building_rkey: "BuildingKey") -> float:
+        total_energy_cost = 0
+        for _, end_use_energy_intensities in final_energy_demand.items():
+            for id_energy_carrier, end_use_final_energy_demand in end_use_energy_intensities:
+                rkey = building_rkey.with_(id_energy_carrier=id_energy_carrier)
+                total_energy_cost += end_use_final_energy_demand * self.scenario.s_final_energy_carrier_price.get_item(rkey)
+        return total_energy_cost
 
     def update_heating_system_renewable_percentage(self):
         self.heating_system_renewable_percentage = 0
@@ -674,14 +803,40 @@ class Building(Agent):
         self.heating_system_renewable_percentage = renewable_demand / (renewable_demand + non_renewable_demand)
 
     def update_final_energy_demand_and_cost(self):
-        self.calc_building_heating_cooling_demand()
+        if self.r5c1_outdated:
+            self.calc_building_heating_cooling_demand()
+        self.update_final_energy_demand_and_cost_without_r5c1()
+
+    def update_final_energy_demand_and_cost_without_r5c1(self):
+        # heating and cooling demand are already updated, e.g., by `BuildingEnvironment.calc_buildings_heating_cooling_demand`
+        # appliance demand and energy carrier prices are year-dependent, so they are always updated
         self.update_appliance_final_energy_demand()
-        self.update_space_cooling_final_energy_demand()
-        self.update_space_heating_final_energy_demand()
-        self.update_hot_water_final_energy_demand()
-        self.update_ventilation_final_energy_demand()
+        if self.final_energy_demand_outdated:
+            self.update_space_cooling_final_energy_demand()
+            self.update_space_heating_final_energy_demand()
+            self.update_hot_water_final_energy_demand()
+            self.update_ventilation_final_energy_demand()
+            self.update_heating_system_renewable_percentage()
+            self.final_energy_demand_outdated = False
         self.update_total_energy_cost()
-        self.update_heating_system_renewable_percentage()
+
+    def update_appliance_electricity_profile(self, index: float):
+        self.appliance_electricity_profile = self.appliance_electricity_profile * index
+        self.appliance_electricity_demand = sum_profile(self.appliance_electricity_profile)
+        self.appliance_electricity_demand_per_person = self.appliance_electricity_demand / self.population
+        # internal gain of appliances is an input of r5c1
+        self.mark_r5c1_outdated()
+
+    def update_hot_water_profile(self, index: float):
+        self.hot_water_profile = self.hot_water_profile * index
+        self.hot_water_demand = sum_profile(self.hot_water_profile)
+        self.hot_water_demand_per_person = self.hot_water_demand / self.population
+        self.hot_water_demand_per_m2 = self.hot_water_demand / self.total_living_area
+        # hot water is not an input of r5c1, so only the aggregated heating indicators are updated
+        self.total_heating_demand_peak = (self.heating_demand_profile + self.hot_water_profile).max()
+        self.total_heating_per_m2 = self.heating_demand_per_m2 + self.hot_water_demand_per_m2
+        self.total_heating_per_m2_norm = self.heating_demand_per_m2_norm + self.hot_water_demand_per_m2
+        self.mark_final_energy_demand_outdated()
 
     """
     Future projection functions
@@ -700,29 +855,107 @@ class Building(Agent):
             "total_energy_cost_before": self.total_energy_cost,
             "component_area": building_component.area
         }
-        d_option_cost = {}
+        d_option_capex = {}
         for id_building_action in [cons.ID_BUILDING_ACTION_CONVENTIONAL_RENOVATION, cons.ID_BUILDING_ACTION_SERIAL_RENOVATION]:
-            rkey = building_component.rkey.make_copy().set_id({"id_building_action": id_building_action})
+            rkey = building_component.rkey.with_(id_building_action=id_building_action)
             for id_building_component_option_efficiency_class in self.scenario.building_component_option_efficiency_classes.keys():
                 rkey.id_building_component_option_efficiency_class = id_building_component_option_efficiency_class
                 if self.scenario.s_building_component_availability.get_item(rkey):
-                    capex = (
+                    d_option_capex[(id_building_action, id_building_component_option_efficiency_class)] = (
                             self.scenario.building_component_capex.get_item(rkey) *
                             building_component.area *
                             (1 - self.scenario.s_subsidy_building_renovation.get_item(rkey))
                     )
-                    self.renovate_component(
-                        component_name=component_name,
-                        id_building_component_option_efficiency_class=id_building_component_option_efficiency_class
-                    )
-                    energy_cost_saving = (before_renovation_status["total_energy_cost_before"] - self.total_energy_cost)
-                    d_option_cost[(id_building_action, id_building_component_option_efficiency_class)] = capex - energy_cost_saving
+        # the energy cost after renovation does not depend on the building action,
+        # so each efficiency class is evaluated only once
+        d_total_energy_cost = self.evaluate_component_options(
+            component_name=component_name,
+            option_efficiency_classes=list(dict.fromkeys(option[1] for option in d_option_capex.keys()))
+        )
+        d_option_cost = {}
+        for option, capex in d_option_capex.items():
+            energy_cost_saving = (before_renovation_status["total_energy_cost_before"] - d_total_energy_cost[option[1]])
+            d_option_cost[option] = capex - energy_cost_saving
         id_building_action, id_building_component_option_efficiency_class = dict_utility_sample(
             options=dict_normalize(d_option_cost),
             utility_power=self.scenario.s_building_component_utility_power.get_item(rkey)
         )
         return before_renovation_status, id_building_action, id_building_component_option_efficiency_class
 
+    def evaluate_component_options(self, component_name: str, option_efficiency_classes: List[int]) -> Dict[int, float]:
+        """
+        Calculates the total energy cost of the building after renovating the component to each efficiency class.
+        The building and its components are not modified: each option is evaluated on a renovated copy of the component,
+        and the r5c1 calculations of all options are conducted in two batches (norm and real condition).
+        Results under norm condition are reused if the option was evaluated before under the same weather profiles.
+        """
+        if not option_efficiency_classes:
+            return {}
+        representative_days = self.get_r5c1_representative_days()
+        weather_temperature = self.get_weather_temperature_profile(self.rkey)
+        set_temperature_min_norm, set_temperature_max_norm = self.get_set_temperature_profiles(self.rkey, norm=True)
+        options_params = []
+        options_norm_key = []
+        for id_building_component_option_efficiency_class in option_efficiency_classes:
+            building_components = self.building_components.copy()
+            building_components[component_name] = building_components[component_name].make_renovated_copy(
+                id_building_component_option_efficiency_class=id_building_component_option_efficiency_class
+            )
+            options_params.append(self.get_r5c1_params(building_components=building_components))
+            options_norm_key.append(self.get_r5c1_norm_key(building_components=building_components))
+
+        # norm condition --> building efficiency class
+        options_to_calc = [index for index, key in enumerate(options_norm_key) if key not in self.r5c1_norm_results]
+        if options_to_calc:
+            heating_demand_profiles, cooling_demand_profiles = conduct_r5c1_batch([
+                R5C1Input(
+                    weather_temperature=weather_temperature,
+                    set_temperature_min=set_temperature_min_norm,
+                    set_temperature_max=set_temperature_max_norm,
+                    **options_params[index]
+                ) for index in options_to_calc
+            ], cache=self.scenario.r5c1_cache, representative_days=representative_days)
+            for index, heating_demand_profile, cooling_demand_profile in zip(
+                    options_to_calc, heating_demand_profiles, cooling_demand_profiles
+            ):
+                self.set_r5c1_norm_result(
+                    options_norm_key[index],
+                    sum_profile(heating_demand_profile) / 1000,
+                    sum_profile(abs(cooling_demand_profile / 1000))
+                )
+        options_rkey = []
+        for r5c1_norm_key in options_norm_key:
+            rkey = self.rkey.make_copy()
+            heating_demand_norm, _ = self.r5c1_norm_results[r5c1_norm_key]
+            id_building_efficiency_class = self.get_building_efficiency_class(heating_demand_norm / self.total_living_area)
+            if id_building_efficiency_class is not None:
+                rkey.id_building_efficiency_class = id_building_efficiency_class
+            options_rkey.append(rkey)
+
+        # real condition --> total energy cost
+        r5c1_inputs = []
+        for params, rkey in zip(options_params, options_rkey):
+            set_temperature_min, set_temperature_max = self.get_set_temperature_profiles(rkey, cache=False)
+            r5c1_inputs.append(R5C1Input(
+                weather_temperature=weather_temperature,
+                set_temperature_min=set_temperature_min,
+                set_temperature_max=set_temperature_max,
+                **params
+            ))
+        heating_demand_profiles, cooling_demand_profiles = conduct_r5c1_batch(
+            r5c1_inputs,
+            representative_days=representative_days
+        )
+        d_total_energy_cost = {}
+        for id_building_component_option_efficiency_class, rkey, heating_demand_profile, cooling_demand_profile in zip(
+                option_efficiency_classes, options_rkey, heating_demand_profiles, cooling_demand_profiles
+        ):
+            final_energy_demand = self.final_energy_demand.copy()
+            final_energy_demand[cons.ID_END_USE_SPACE_HEATING] = self.get_space_heating_final_energy_demand(sum_profile(heating_demand_profile) / 1000)
+            final_energy_demand[cons.ID_END_USE_SPACE_COOLING] = self.get_space_cooling_final_energy_demand(sum_profile(cooling_demand_profile) / 1000)
+            d_total_energy_cost[id_building_component_option_efficiency_class] = self.get_total_energy_cost(final_energy_demand, rkey)
+        return d_total_energy_cost
+
     def renovate_component(
             self,
             component_name: str,
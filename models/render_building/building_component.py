@@ -1,3 +1,4 @@
+import copy
 import random
 from typing import TYPE_CHECKING, Optional
 
@@ -58,8 +59,7 @@ class BuildingComponent:
             self.select_random_efficiency_class(action_year=action_year, id_building_action=cons.ID_BUILDING_ACTION_CONVENTIONAL_RENOVATION)
 
     def select_random_efficiency_class(self, action_year: int, id_building_action: int):
-        rkey = self.rkey.make_copy()
-        rkey.year, rkey.id_building_action = action_year, id_building_action
+        rkey = self.rkey.with_(year=action_year, id_building_action=id_building_action)
         d = {}
         for id_building_component_option_efficiency_class in self.scenario.building_component_option_efficiency_classes.keys():
             rkey.id_building_component_option_efficiency_class = id_building_component_option_efficiency_class
@@ -76,3 +76,12 @@ class BuildingComponent:
 
 
 
+
+    def make_renovated_copy(self, id_building_component_option_efficiency_class: int) -> "BuildingComponent":
+        # used for evaluating renovation options without modifying the component
+        component = copy.copy(self)
+        component.rkey = self.rkey.with_(
+            id_building_component_option_efficiency_class=id_building_component_option_efficiency_class
+        )
+        component.u_value = self.scenario.p_building_component_efficiency.get_item(component.rkey)
+        return component
@@ -5,6 +5,31 @@ from models.render.render_key import RenderKey
 
 class BuildingKey(RenderKey):
 
+    __slots__ = (
+        "id_building_action",
+        "id_building_construction_period",
+        "id_building_height",
+        "id_building_location",
+        "id_building_ownership",
+        "id_building_type",
+        "id_building_component",
+        "id_building_component_option",
+        "id_building_component_option_efficiency_class",
+        "id_building_efficiency_class",
+        "id_orientation",
+        "id_unit_user_type",
+        "id_dwelling_ownership",
+        "id_heating_system",
+        "id_heating_system_action",
+        "id_heating_technology",
+        "id_radiator",
+        "id_cooling_technology",
+        "id_cooling_technology_efficiency_class",
+        "id_ventilation_technology",
+        "id_ventilation_technology_efficiency_class",
+        "id_end_use",
+    )
+
     def __init__(
         self,
         id_scenario: Optional[int] = None,
@@ -1,162 +1,391 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
 import numpy as np
-from numba import njit, float64, int64
-from numba.experimental import jitclass
-
-
-@njit
-def create_empty_arr():
-    return np.zeros((8760, ))
-
-
-spec = [
-    ('a_m', float64),
-    ('a_is', float64),
-    ('phi_m', float64),
-    ('phi_st', float64),
-    ('phi_ia', float64),
-    ('h_tr_em', float64),
-    ('h_tr_1', float64),
-    ('h_tr_2', float64),
-    ('h_tr_3', float64),
-    ('h_tr_w', float64),
-    ('h_tr_op', float64),
-    ('h_tr_ms', float64),
-    ('h_tr_is', float64),
-    ('h_vent_adj', float64),
-    ('phi_hc_nd', float64),
-    ('t_ext', float64),
-    ('phi_m_tot', float64),
-    ("building_occupancy_profile", float64[:]),
-    ("building_appliance_electricity_profile", float64[:]),
-    ("building_hot_water_profile", float64[:]),
-    ("height", int64),
-    ("total_living_area", int64),
-    ("height", int64),
-    ("internal_gain", float64[:]),
-    ("weather_temperature", float64[:]),
-    ("set_temperature_max", float64[:]),
-    ("set_temperature_min", float64[:]),
-    ("heating_demand_profile", float64[:]),
-    ("cooling_demand_profile", float64[:]),
-    ("temp_mass_profile", float64[:]),
-    ("temp_surface_profile", float64[:]),
-    ("temp_air_profile", float64[:]),
-    ("temp_mass_next", float64),
-    ("temp_mass", float64),
-    ("solar_gain", float64[:]),
-    ("temp_air", float64),
-    ("temp_surface", float64),
-    ("c_m", float64),
+from numba import njit, prange
+
+from models.render.precision import get_profile_dtype, PROFILE_PRECISIONS
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+
+"""
+R5C1 calculation (ISO 13790) in batches
+"""
+
+R5C1_PARAMS = [
+    "a_m",
+    "a_is",
+    "h_tr_em",
+    "h_tr_1",
+    "h_tr_2",
+    "h_tr_3",
+    "h_tr_w",
+    "h_tr_ms",
+    "h_tr_is",
+    "h_vent_adj",
+    "c_m",
+    "total_living_area",
+]
+
+R5C1_PROFILES = [
+    "internal_gain",
+    "solar_gain",
+    "weather_temperature",
+    "set_temperature_min",
+    "set_temperature_max",
 ]
 
 
-@jitclass(spec)
-class R5C1:
-
-    """
-    ISO 13790
-    """
-
-    def __init__(self):
-        self.temp_mass_next = 0.0
-
-    def heat_flow(self, hour):
-        # heat flow to the air node - Equation C1
-        self.phi_ia = 0.5 * self.internal_gain[hour]
-        # heat flow to the thermal mass node - Equation C2
-        self.phi_m = (self.a_m / self.a_is) * \
-            ((0.5 * self.internal_gain[hour]) + self.solar_gain[hour])
-        # heat flow to the surface node - Equation C3
-        self.phi_st = (1 - (self.a_m / self.a_is) - (self.h_tr_w / (9.1 * self.a_is))) * \
-                      ((0.5 * self.internal_gain[hour]) + self.solar_gain[hour])
-
-    def calc_phi_m_tot(self, hour, phi_hc_nd):
-        # Equation 5 from Annex C of ISO 13790:2008 P.114
-        t_ext = self.weather_temperature[hour]
-        self.phi_m_tot = self.phi_m + (t_ext * self.h_tr_em) + self.h_tr_3 * \
-            (
-            self.phi_st + (self.h_tr_w * t_ext) +
-            self.h_tr_1 * (((self.phi_ia + phi_hc_nd) / self.h_vent_adj) + t_ext)
-        ) / self.h_tr_2
-
-    def calc_temp_mass_next(self, temp_mass_prev):
-        self.temp_mass_next = (temp_mass_prev * (self.c_m - 0.5 * (self.h_tr_3 + self.h_tr_em)) + self.phi_m_tot) / \
-                              (self.c_m + (0.5 * (self.h_tr_3 + self.h_tr_em)))
-
-    def calc_temp_mass(self, temp_mass_prev):
-        # Equation 9 from Annex C of ISO 13790:2008 P.114
-        # average between the new next temperature and the previous temperature
-        self.temp_mass = (self.temp_mass_next + temp_mass_prev) / 2
-
-    def calc_temp_surface(self, hour, phi_hc_nd):
-        # Equation 10 from Annex C of ISO 13790:2008 P.114
-        # the average temperature value at the surface node
-        t_ext = self.weather_temperature[hour]
-        self.temp_surface = (
-            (self.h_tr_ms * self.temp_mass) +
-            self.phi_st + (self.h_tr_w * t_ext) +
-            self.h_tr_1 * (t_ext + ((self.phi_ia + phi_hc_nd) / self.h_vent_adj))
-        ) / (self.h_tr_ms + self.h_tr_w + self.h_tr_1)
-
-    def calc_temp_air(self, hour, phi_hc_nd):
-        # Equation 11 from Annex C of ISO 13790:2008 P.115
-        # average temperature of the air inside the building
-        t_ext = self.weather_temperature[hour]
-        self.temp_air = (
-            self.h_tr_is * self.temp_surface +
-            self.h_vent_adj * t_ext +
-            self.phi_ia + phi_hc_nd
-        ) / (self.h_tr_is + self.h_vent_adj)
-
-    def calc_crank_nicholson(self, hour, phi_hc_nd, temp_mass_prev):
-        """
-        Calculates the temp_air, temp_mass, temp_surface for each hour
-        """
-        self.heat_flow(hour)
-        self.calc_phi_m_tot(hour, phi_hc_nd)
-        self.calc_temp_mass_next(temp_mass_prev)
-        self.calc_temp_mass(temp_mass_prev)
-        self.calc_temp_surface(hour, phi_hc_nd)
-        self.calc_temp_air(hour, phi_hc_nd)
-        return self.temp_air, self.temp_surface, self.temp_mass
-
-    def update_building_heating_cooling_demand(self):
-        self.heating_demand_profile: np.ndarray = create_empty_arr()
-        self.cooling_demand_profile: np.ndarray = create_empty_arr()
-        self.temp_mass_profile: np.ndarray = create_empty_arr()
-        self.temp_surface_profile: np.ndarray = create_empty_arr()
-        self.temp_air_profile: np.ndarray = create_empty_arr()
-        TEMP_MASS_PREV_START = 20.0
-        for hour in range(0, 8760):
-            temp_cooling = self.set_temperature_max[hour]
-            temp_heating = self.set_temperature_min[hour]
-            temp_mass_prev = TEMP_MASS_PREV_START if hour == 0 else self.temp_mass_next
-            temp_air_start, temp_surface_start, temp_mass_start = self.calc_crank_nicholson(
-                hour, 0, temp_mass_prev)
-            if temp_air_start < temp_heating:
-                phi_hc_nd = 10 * self.total_living_area
-                temp_air_heated, temp_surface_heated, temp_mass_heated = self.calc_crank_nicholson(
-                    hour, phi_hc_nd, temp_mass_prev)
-                self.heating_demand_profile[hour] = phi_hc_nd * (
-                    temp_heating - temp_air_start) / (temp_air_heated - temp_air_start)
-                self.cooling_demand_profile[hour] = 0
-                self.temp_air_profile[hour], self.temp_surface_profile[hour], self.temp_mass_profile[hour] = \
-                    self.calc_crank_nicholson(hour, self.heating_demand_profile[hour], temp_mass_prev)
-            elif temp_heating <= temp_air_start <= temp_cooling:
-                self.heating_demand_profile[hour] = 0
-                self.cooling_demand_profile[hour] = 0
-                self.temp_air_profile[hour] = temp_air_start
-                self.temp_surface_profile[hour] = temp_surface_start
-                self.temp_mass_profile[hour] = temp_mass_start
-            else:
-                phi_hc_nd = 10 * self.total_living_area
-                temp_air_cooled, temp_surface_cooled, temp_mass_cooled = self.calc_crank_nicholson(
-                    hour, phi_hc_nd, temp_mass_prev)
-                self.heating_demand_profile[hour] = 0
-                self.cooling_demand_profile[hour] = phi_hc_nd * \
-                                                    (temp_cooling - temp_air_start) / \
-                                                    (temp_air_cooled - temp_air_start)
-                self.temp_air_profile[hour], self.temp_surface_profile[hour], self.temp_mass_profile[hour] = \
-                    self.calc_crank_nicholson(hour, self.cooling_demand_profile[hour], temp_mass_prev)
-        return self
+@njit(cache=True)
+def calc_crank_nicholson(params, internal_gain, solar_gain, t_ext, phi_hc_nd, temp_mass_prev):
+    """
+    Crank-Nicholson step of the R5C1 model, with the building parameters passed as an array ordered as R5C1_PARAMS.
+    Returns temp_air, temp_surface, temp_mass and temp_mass_next of the hour.
+    """
+    a_m, a_is, h_tr_em, h_tr_1, h_tr_2, h_tr_3, h_tr_w, h_tr_ms, h_tr_is, h_vent_adj, c_m = (
+        params[0], params[1], params[2], params[3], params[4], params[5], params[6], params[7], params[8], params[9], params[10]
+    )
+    # heat flows to the air, thermal mass and surface node - Equation C1, C2, C3
+    phi_ia = 0.5 * internal_gain
+    phi_m = (a_m / a_is) * (0.5 * internal_gain + solar_gain)
+    phi_st = (1 - (a_m / a_is) - (h_tr_w / (9.1 * a_is))) * (0.5 * internal_gain + solar_gain)
+    # Equation 5 from Annex C of ISO 13790:2008 P.114
+    phi_m_tot = phi_m + (t_ext * h_tr_em) + h_tr_3 * (
+        phi_st + (h_tr_w * t_ext) + h_tr_1 * (((phi_ia + phi_hc_nd) / h_vent_adj) + t_ext)
+    ) / h_tr_2
+    temp_mass_next = (temp_mass_prev * (c_m - 0.5 * (h_tr_3 + h_tr_em)) + phi_m_tot) / (c_m + (0.5 * (h_tr_3 + h_tr_em)))
+    # Equation 9, 10, 11 from Annex C of ISO 13790:2008 P.114-115
+    temp_mass = (temp_mass_next + temp_mass_prev) / 2
+    temp_surface = (
+        (h_tr_ms * temp_mass) + phi_st + (h_tr_w * t_ext) + h_tr_1 * (t_ext + ((phi_ia + phi_hc_nd) / h_vent_adj))
+    ) / (h_tr_ms + h_tr_w + h_tr_1)
+    temp_air = (h_tr_is * temp_surface + h_vent_adj * t_ext + phi_ia + phi_hc_nd) / (h_tr_is + h_vent_adj)
+    return temp_air, temp_surface, temp_mass, temp_mass_next
+
+
+@njit(cache=True)
+def calc_heating_cooling_demand(
+        params,
+        internal_gain,
+        solar_gain,
+        weather_temperature,
+        set_temperature_min,
+        set_temperature_max,
+        heating_demand_profile,
+        cooling_demand_profile,
+):
+    """
+    Hourly loop of the R5C1 model, writing into the given demand profiles (unit: Wh).
+    The calculation is done in float64, regardless of the precision of the profiles.
+    """
+    phi_hc_nd_max = 10 * params[11]
+    temp_mass_prev = 20.0
+    for hour in range(internal_gain.shape[0]):
+        t_ext = weather_temperature[hour]
+        temp_heating = set_temperature_min[hour]
+        temp_cooling = set_temperature_max[hour]
+        temp_air_start, _, _, temp_mass_next = calc_crank_nicholson(
+            params, internal_gain[hour], solar_gain[hour], t_ext, 0.0, temp_mass_prev)
+        if temp_air_start < temp_heating:
+            temp_air_heated, _, _, _ = calc_crank_nicholson(
+                params, internal_gain[hour], solar_gain[hour], t_ext, phi_hc_nd_max, temp_mass_prev)
+            phi_hc_nd = phi_hc_nd_max * (temp_heating - temp_air_start) / (temp_air_heated - temp_air_start)
+            heating_demand_profile[hour] = phi_hc_nd
+            cooling_demand_profile[hour] = 0
+            _, _, _, temp_mass_next = calc_crank_nicholson(
+                params, internal_gain[hour], solar_gain[hour], t_ext, phi_hc_nd, temp_mass_prev)
+        elif temp_air_start <= temp_cooling:
+            heating_demand_profile[hour] = 0
+            cooling_demand_profile[hour] = 0
+        else:
+            temp_air_cooled, _, _, _ = calc_crank_nicholson(
+                params, internal_gain[hour], solar_gain[hour], t_ext, phi_hc_nd_max, temp_mass_prev)
+            phi_hc_nd = phi_hc_nd_max * (temp_cooling - temp_air_start) / (temp_air_cooled - temp_air_start)
+            heating_demand_profile[hour] = 0
+            cooling_demand_profile[hour] = phi_hc_nd
+            _, _, _, temp_mass_next = calc_crank_nicholson(
+                params, internal_gain[hour], solar_gain[hour], t_ext, phi_hc_nd, temp_mass_prev)
+        temp_mass_prev = temp_mass_next
+
+
+@njit(parallel=True, cache=True)
+def calc_heating_cooling_demand_batch(
+        params,
+        internal_gain,
+        solar_gain,
+        weather_temperature,
+        set_temperature_min,
+        set_temperature_max,
+):
+    """
+    params: (N, len(R5C1_PARAMS)), profiles: (N, hours) --> heating and cooling demand profiles: (N, hours), unit: Wh
+    The demand profiles have the same precision as the input profiles.
+    """
+    building_num, hours = internal_gain.shape
+    heating_demand_profiles = np.zeros((building_num, hours), dtype=internal_gain.dtype)
+    cooling_demand_profiles = np.zeros((building_num, hours), dtype=internal_gain.dtype)
+    for i in prange(building_num):
+        calc_heating_cooling_demand(
+            params[i],
+            internal_gain[i],
+            solar_gain[i],
+            weather_temperature[i],
+            set_temperature_min[i],
+            set_temperature_max[i],
+            heating_demand_profiles[i],
+            cooling_demand_profiles[i],
+        )
+    return heating_demand_profiles, cooling_demand_profiles
+
+
+def precompile_r5c1_kernels():
+    """
+    Compiles the numba kernels and writes them to the on-disk cache (`__pycache__`),
+    so that the processes started for parallel runs load the compiled kernels instead of compiling them again.
+    """
+    params = np.ones((1, len(R5C1_PARAMS)))
+    for dtype in PROFILE_PRECISIONS.values():
+        profiles = [np.zeros((1, 24), dtype=dtype) for _ in R5C1_PROFILES]
+        calc_heating_cooling_demand_batch(params, *profiles)
+    log.info("R5C1 kernels are compiled.")
+
+
+class RepresentativeDays:
+
+    """
+    Reduced-resolution mode of r5c1: instead of 8760 hours, the calculation is conducted for representative days,
+    which are clustered (k-means) from the daily weather temperature and radiation profiles.
+    The coldest and the hottest day are kept as extra representative days, so that the peak demand is not smoothed out.
+    Each representative day is calculated after `warm_up_days` preceding days, so that the thermal mass is initialized.
+    The results are expanded back to 8760 hours by the day-to-cluster assignment,
+    so the annual demand equals the weighted sum of the representative days.
+    """
+
+    def __init__(
+            self,
+            weather_temperature: np.ndarray,
+            weather_radiation: np.ndarray,
+            representative_day_number: int,
+            warm_up_days: int = 1,
+            max_iteration: int = 100,
+    ):
+        self.warm_up_days = warm_up_days
+        self.error: Optional[dict] = None  # relative error against the full-year calculation, see `report_representative_days_error`
+        days = len(weather_temperature) // 24
+        temperature = weather_temperature.reshape(days, 24)
+        radiation = weather_radiation.reshape(days, 24)
+        features = np.hstack([
+            (temperature - temperature.mean()) / max(temperature.std(), 1e-9),
+            (radiation - radiation.mean()) / max(radiation.std(), 1e-9)
+        ])
+        daily_temperature = temperature.mean(axis=1)
+        representative_day_number = min(representative_day_number, days)
+
+        # k-means initialized by the quantiles of daily mean temperature
+        order = np.argsort(daily_temperature)
+        centroids = features[order[np.linspace(0, days - 1, representative_day_number).astype(np.int64)]]
+        for _ in range(max_iteration):
+            distances = ((features[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+            day_cluster = distances.argmin(axis=1)
+            new_centroids = np.array([
+                features[day_cluster == cluster].mean(axis=0) if (day_cluster == cluster).any() else centroids[cluster]
+                for cluster in range(representative_day_number)
+            ])
+            if np.allclose(new_centroids, centroids):
+                break
+            centroids = new_centroids
+
+        # medoids (real days) as representative days
+        representative_days = []
+        for cluster in range(representative_day_number):
+            members = np.where(day_cluster == cluster)[0]
+            if len(members) > 0:
+                representative_days.append(members[((features[members] - centroids[cluster]) ** 2).sum(axis=1).argmin()])
+        representative_days = np.array(representative_days)
+        day_cluster = ((features[:, None, :] - features[representative_days][None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        for extreme_day in [daily_temperature.argmin(), daily_temperature.argmax()]:
+            if extreme_day not in representative_days:
+                representative_days = np.append(representative_days, extreme_day)
+                day_cluster[extreme_day] = len(representative_days) - 1
+
+        self.days = representative_days
+        self.day_cluster = day_cluster
+        # hours to calculate: warm-up days and the representative day itself, for each representative day
+        self.hours = np.concatenate([
+            np.arange(day * 24, (day + 1) * 24) % (days * 24)
+            for representative_day in representative_days
+            for day in range(representative_day - warm_up_days, representative_day + 1)
+        ])
+
+    def reduce(self, profiles: np.ndarray) -> np.ndarray:
+        return profiles[:, self.hours]
+
+    def expand(self, profiles: np.ndarray) -> np.ndarray:
+        segment_hours = (self.warm_up_days + 1) * 24
+        representative_day_profiles = profiles.reshape(len(profiles), len(self.days), segment_hours)[:, :, -24:]
+        return representative_day_profiles[:, self.day_cluster, :].reshape(len(profiles), -1)
+
+
+class R5C1Input:
+
+    """
+    Snapshot of the r5c1 inputs (attributes in R5C1_PARAMS and R5C1_PROFILES), e.g., of a building with a renovation option.
+    """
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class R5C1Cache:
+
+    """
+    LRU cache of r5c1 results (heating and cooling demand profiles, unit: Wh) with a memory budget (unit: byte).
+    The results are keyed by the thermal signature, i.e., a hash of the R5C1_PARAMS and R5C1_PROFILES of the input.
+    Only the calculations under norm condition are cached, because their set temperatures are fixed:
+    under real condition, the set temperature profiles are drawn per building, so the signatures hardly repeat.
+    """
+
+    def __init__(self, memory_budget: int):
+        self.memory_budget = memory_budget
+        self.memory_usage = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._results = OrderedDict()
+
+    @staticmethod
+    def get_signature(r5c1_input) -> bytes:
+        signature = hashlib.blake2b(digest_size=16)
+        signature.update(np.array([getattr(r5c1_input, param) for param in R5C1_PARAMS], dtype=np.float64).tobytes())
+        for profile in R5C1_PROFILES:
+            signature.update(np.ascontiguousarray(getattr(r5c1_input, profile), dtype=np.float64).tobytes())
+        return signature.digest()
+
+    def get(self, signature: bytes):
+        result = self._results.get(signature)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._results.move_to_end(signature)
+        return result
+
+    def put(self, signature: bytes, heating_demand_profile: np.ndarray, cooling_demand_profile: np.ndarray):
+        if signature in self._results:
+            return
+        # copy, so that the cached profiles do not keep the batch arrays alive
+        heating_demand_profile = heating_demand_profile.astype(get_profile_dtype())
+        cooling_demand_profile = cooling_demand_profile.astype(get_profile_dtype())
+        size = heating_demand_profile.nbytes + cooling_demand_profile.nbytes
+        if size > self.memory_budget:
+            return
+        while self.memory_usage + size > self.memory_budget:
+            _, (evicted_heating, evicted_cooling) = self._results.popitem(last=False)
+            self.memory_usage -= evicted_heating.nbytes + evicted_cooling.nbytes
+            self.evictions += 1
+        self._results[signature] = (heating_demand_profile, cooling_demand_profile)
+        self.memory_usage += size
+
+    def get_statistics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+            "evictions": self.evictions,
+            "entries": len(self._results),
+            "memory_usage_mb": self.memory_usage / 1024 ** 2,
+        }
+
+    def log_statistics(self):
+        statistics = self.get_statistics()
+        log.info(
+            f"R5C1Cache --> hits: {statistics['hits']}, misses: {statistics['misses']}, "
+            f"hit rate: {statistics['hit_rate']:.2%}, evictions: {statistics['evictions']}, "
+            f"entries: {statistics['entries']}, memory: {statistics['memory_usage_mb']:.1f}MB"
+        )
+
+
+def conduct_r5c1_batch(
+        r5c1_inputs: list,
+        cache: Optional["R5C1Cache"] = None,
+        representative_days: Optional["RepresentativeDays"] = None
+):
+    """
+    r5c1_inputs: objects (e.g., buildings) carrying the attributes in R5C1_PARAMS and R5C1_PROFILES.
+    Only the inputs not found in the cache (if given) are calculated.
+    If representative_days is given, the calculation is conducted in reduced resolution and expanded to full resolution.
+    All the inputs in the batch must share the weather of the representative days.
+    """
+
+    def calc(inputs: list):
+        params = np.array([[getattr(r5c1_input, param) for param in R5C1_PARAMS] for r5c1_input in inputs], dtype=np.float64)
+        profiles = [
+            np.stack([getattr(r5c1_input, profile) for r5c1_input in inputs]).astype(get_profile_dtype(), copy=False)
+            for profile in R5C1_PROFILES
+        ]
+        if representative_days is None:
+            return calc_heating_cooling_demand_batch(params, *profiles)
+        heating_demand_profiles, cooling_demand_profiles = calc_heating_cooling_demand_batch(
+            params, *[representative_days.reduce(profile) for profile in profiles]
+        )
+        return representative_days.expand(heating_demand_profiles), representative_days.expand(cooling_demand_profiles)
+
+    if cache is None:
+        return calc(r5c1_inputs)
+
+    hours = len(getattr(r5c1_inputs[0], R5C1_PROFILES[0]))
+    heating_demand_profiles = np.zeros((len(r5c1_inputs), hours), dtype=get_profile_dtype())
+    cooling_demand_profiles = np.zeros((len(r5c1_inputs), hours), dtype=get_profile_dtype())
+    missed = {}
+    for index, r5c1_input in enumerate(r5c1_inputs):
+        signature = cache.get_signature(r5c1_input)
+        result = cache.get(signature)
+        if result is not None:
+            heating_demand_profiles[index], cooling_demand_profiles[index] = result
+        elif signature in missed:
+            # identical input in the same batch
+            missed[signature].append(index)
+        else:
+            missed[signature] = [index]
+    if missed:
+        calculated_heating, calculated_cooling = calc([r5c1_inputs[indices[0]] for indices in missed.values()])
+        for (signature, indices), heating_demand_profile, cooling_demand_profile in zip(
+                missed.items(), calculated_heating, calculated_cooling
+        ):
+            heating_demand_profiles[indices] = heating_demand_profile
+            cooling_demand_profiles[indices] = cooling_demand_profile
+            cache.put(signature, heating_demand_profile, cooling_demand_profile)
+    return heating_demand_profiles, cooling_demand_profiles
+
+
+def report_representative_days_error(r5c1_inputs: list, representative_days: "RepresentativeDays") -> dict:
+    """
+    Compares the reduced-resolution results with the full-year calculation (unit: relative error).
+    """
+
+    def get_relative_error(reduced: np.ndarray, full: np.ndarray):
+        return float(np.mean(np.abs(reduced - full) / np.maximum(np.abs(full), 1e-9)))
+
+    heating_full, cooling_full = conduct_r5c1_batch(r5c1_inputs)
+    heating_reduced, cooling_reduced = conduct_r5c1_batch(r5c1_inputs, representative_days=representative_days)
+    error = {
+        "heating_demand": get_relative_error(heating_reduced.sum(axis=1), heating_full.sum(axis=1)),
+        "heating_demand_peak": get_relative_error(heating_reduced.max(axis=1), heating_full.max(axis=1)),
+        "cooling_demand": get_relative_error(cooling_reduced.sum(axis=1), cooling_full.sum(axis=1)),
+        "cooling_demand_peak": get_relative_error(np.abs(cooling_reduced).max(axis=1), np.abs(cooling_full).max(axis=1)),
+    }
+    log.info(
+        f"RepresentativeDays --> {len(representative_days.days)} days ({len(representative_days.hours)} hours), "
+        f"mean relative error against full year ({len(r5c1_inputs)} samples): " +
+        ", ".join(f"{key}: {value:.2%}" for key, value in error.items())
+    )
+    return error
+
 
+if __name__ == "__main__":
+    # python -m models.render_building.building_r5c1
+    precompile_r5c1_kernels()
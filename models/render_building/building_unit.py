@@ -52,10 +52,10 @@ class UnitUser:
 
     @property
     def appliance_electricity_profile(self):
-        appliance_electricity_rkey = self.rkey.make_copy().set_id({
-            "id_end_use": cons.ID_END_USE_APPLIANCE,
-            "id_energy_carrier": cons.ID_ENERGY_CARRIER_ELECTRICITY
-        })
+        appliance_electricity_rkey = self.rkey.with_(
+            id_end_use=cons.ID_END_USE_APPLIANCE,
+            id_energy_carrier=cons.ID_ENERGY_CARRIER_ELECTRICITY
+        )
         appliance_electricity_profile = (
                 self.scenario.pr_appliance_electricity.get_item(self.rkey) *
                 self.person_num *
@@ -45,5 +45,10 @@ MANDATORY_RENOVATION_YEAR_MAX_DELAY = 10
 MANDATORY_HEATING_SYSTEM_MODERNIZATION_YEAR_DEFAULT = 9999
 MANDATORY_HEATING_SYSTEM_MODERNIZATION_YEAR_MAX_DELAY = 10
 
+R5C1_BATCH_SIZE = 1000  # number of buildings solved in one batched r5c1 calculation
+R5C1_CACHE_MEMORY_BUDGET = 32 * 1024 ** 2  # byte, results under norm condition only
+R5C1_REPRESENTATIVE_DAYS_WARM_UP = 1  # number of days calculated before each representative day
+R5C1_REPRESENTATIVE_DAYS_ERROR_SAMPLE_SIZE = 20  # number of buildings compared with the full-year calculation
+
 REGION_DATA_SUBFOLDER = 'region_data'
 INIT_DATA_SUBFOLDER = 'init_data'
\ No newline at end of file
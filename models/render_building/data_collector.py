@@ -49,7 +49,7 @@ class BuildingDataCollector(RenderDataCollector):
             for key, value in building.__dict__.items():
                 if value is not None:
                     if isinstance(value, int) or isinstance(value, float):
-                        if key not in ["id", "id_energy_carrier", "id_heating_technology", "id_end_use", "exists"]:
+                        if key not in ["id", "id_energy_carrier", "id_heating_technology", "id_end_use", "exists", "r5c1_outdated", "final_energy_demand_outdated"]:
                             building_dict[key] = value
             # collect building components
             for component_name, building_component in building.building_components.items():
@@ -203,6 +203,9 @@ class BuildingDataCollector(RenderDataCollector):
             unit: Optional[str] = None,
             sub_folder: Optional[str] = None
     ):
+        if if_exists == "pass" and os.path.isfile(self.get_output_path(df_name, sub_folder)):
+            # e.g., the national tables exported by the scenario of another region
+            return
         df = rdict.to_dataframe()
         if len(df) > 0:
             if unit is not None:
@@ -210,6 +213,11 @@ class BuildingDataCollector(RenderDataCollector):
                 df.insert(unit_position, "unit", unit)
             self.save_dataframe(df=df, df_name=df_name, if_exists=if_exists, sub_folder=sub_folder)
 
+    def get_output_path(self, df_name: str, sub_folder: Optional[str] = None) -> str:
+        if sub_folder is None:
+            return os.path.join(self.config.output_folder, f"{df_name}.csv")
+        return os.path.join(self.config.output_folder, sub_folder, f"{df_name}.csv")
+
     def save_dataframe(
             self,
             df: pd.DataFrame,
@@ -218,11 +226,9 @@ class BuildingDataCollector(RenderDataCollector):
             sub_folder: Optional[str] = None
     ):
         if len(df) > 0:
-            if sub_folder is None:
-                path = os.path.join(self.config.output_folder, f"{df_name}.csv")
-            else:
+            if sub_folder is not None:
                 os.makedirs(os.path.join(self.config.output_folder, sub_folder), exist_ok=True)
-                path = os.path.join(self.config.output_folder, sub_folder, f"{df_name}.csv")
+            path = self.get_output_path(df_name, sub_folder)
             if os.path.isfile(path):
                 if if_exists == "append":
                     df.to_csv(path, mode="a", header=False, index=False)
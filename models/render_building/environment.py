@@ -1,14 +1,17 @@
 import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
+import numpy as np
 from Melodie import Environment
 from tqdm import tqdm
 
 from models.render_building import cons
 from models.render_building.building_key import BuildingKey
+from models.render_building.building_r5c1 import conduct_r5c1_batch, report_representative_days_error
 
 if TYPE_CHECKING:
     from Melodie import AgentList
+    from models.render.render_dict import DenseRenderDict
     from models.render_building.scenario import BuildingScenario
     from models.render_building.building import Building
 
@@ -20,9 +23,12 @@ class BuildingEnvironment(Environment):
     def setup(self):
         self.year = 0
 
-    @staticmethod
-    def setup_buildings(buildings: "AgentList[Building]"):
-
+    def setup_buildings(self, buildings: "AgentList[Building]"):
+        # The r5c1 calculation is conducted for all buildings between the two loops (see `calc_buildings_heating_cooling_demand`),
+        # so the random draws are in the order of the stages instead of the buildings: the draws of the first loop
+        # (units, size, construction, components, renovation history and radiator) of all buildings come before
+        # the draws of the technology initialization of any building. With a fixed seed, the buildings are therefore
+        # initialized differently than with a single per-building loop.
         for building in tqdm(buildings, desc="Setting up buildings --> "):
             building.init_rkey()
             building.init_units()
@@ -32,7 +38,10 @@ class BuildingEnvironment(Environment):
             building.init_building_components()
             building.init_building_renovation_history()
             building.init_radiator()
-            building.calc_building_heating_cooling_demand()
+
+        self.calc_buildings_heating_cooling_demand(buildings)
+
+        for building in tqdm(buildings, desc="Setting up building technologies --> "):
             building.init_building_cooling_system()
             building.init_building_heating_system()
             building.init_building_ventilation_system()
@@ -46,6 +55,53 @@ class BuildingEnvironment(Environment):
             building.init_building_gas_availability()
             building.init_building_hydrogen_availability()
 
+    def calc_buildings_heating_cooling_demand(self, buildings: "List[Building]"):
+        """
+        Batched version of `Building.calc_building_heating_cooling_demand`:
+        the r5c1 calculation under norm and real condition is conducted once per batch instead of once per building.
+        Only the buildings with outdated r5c1 inputs are calculated,
+        and the calculation under norm condition is skipped if the building has a valid result (see `Building.get_r5c1_norm_result`).
+        """
+
+        def conduct_r5c1_calculation(r5c1_batch: "List[Building]", norm: bool):
+            if not r5c1_batch:
+                return
+            heating_demand_profiles, cooling_demand_profiles = conduct_r5c1_batch(
+                r5c1_batch,
+                cache=self.scenario.r5c1_cache if norm else None,
+                representative_days=representative_days
+            )
+            for building, heating_demand_profile, cooling_demand_profile in zip(r5c1_batch, heating_demand_profiles, cooling_demand_profiles):
+                building.update_heating_cooling_demand(heating_demand_profile, cooling_demand_profile)
+
+        buildings = [building for building in buildings if building.r5c1_outdated]
+        for start in range(0, len(buildings), cons.R5C1_BATCH_SIZE):
+            batch = buildings[start:start + cons.R5C1_BATCH_SIZE]
+            # buildings in the same scenario share the weather profiles
+            representative_days = batch[0].get_r5c1_representative_days()
+            norm_batch = []
+            for building in batch:
+                building.update_r5c1_params()
+                r5c1_norm_result = building.get_r5c1_norm_result()
+                if r5c1_norm_result is None:
+                    building.update_r5c1_temperature(norm=True)
+                    norm_batch.append(building)
+                else:
+                    building.apply_r5c1_norm_result(*r5c1_norm_result)
+            conduct_r5c1_calculation(norm_batch, norm=True)
+            for building in norm_batch:
+                building.update_building_efficiency_class()
+            for building in batch:
+                building.update_r5c1_temperature()
+            if representative_days is not None and representative_days.error is None:
+                representative_days.error = report_representative_days_error(
+                    r5c1_inputs=batch[:cons.R5C1_REPRESENTATIVE_DAYS_ERROR_SAMPLE_SIZE],
+                    representative_days=representative_days
+                )
+            conduct_r5c1_calculation(batch, norm=False)
+            for building in batch:
+                building.update_reality_norm_factor()
+
     @staticmethod
     def update_buildings_year(buildings: "AgentList[Building]"):
 
@@ -77,7 +133,10 @@ class BuildingEnvironment(Environment):
             building.pv_system.rkey.year += 1
 
         for building in buildings:
+            weather_year = building.adjust_year_for_weather_profiles(building.rkey.year)
             building.rkey.year += 1
+            if building.adjust_year_for_weather_profiles(building.rkey.year) != weather_year:
+                building.mark_r5c1_outdated()
             update_units_year()
             update_components_year()
             update_radiator_year()
@@ -91,99 +150,73 @@ class BuildingEnvironment(Environment):
             if building.exists:
                 self.scenario.building_number.accumulate_item(building.rkey, building.building_number)
 
-    @staticmethod
-    def update_buildings_energy_demand_and_cost(buildings: "AgentList[Building]"):
+    def update_buildings_energy_demand_and_cost(self, buildings: "AgentList[Building]"):
+        self.calc_buildings_heating_cooling_demand(buildings)
         for building in buildings:
-            building.update_final_energy_demand_and_cost()
+            building.update_final_energy_demand_and_cost_without_r5c1()
 
-    def update_buildings_infrastructure_district_heating(self, buildings: "AgentList[Building]"):
+    @staticmethod
+    def get_adoption_probs(rdict: "DenseRenderDict", buildings: List["Building"]) -> np.ndarray:
+        # probability for the buildings that have not adopted yet, derived from the increase of the adoption rate
+        keys = rdict.stack_keys([building.rkey for building in buildings])
+        rates_1 = rdict.get_items(keys)
+        keys["year"] = keys["year"] - 1
+        rates_0 = rdict.get_items(keys)
+        return (rates_1 - rates_0) / (1 - rates_0)
 
-        def get_district_heating_connection_prob(rkey: "BuildingKey"):
-            connection_rate_1 = self.scenario.s_infrastructure_availability_district_heating.get_item(rkey)
-            rkey.year = rkey.year - 1
-            connection_rate_0 = self.scenario.s_infrastructure_availability_district_heating.get_item(rkey)
-            return (connection_rate_1 - connection_rate_0) / (1 - connection_rate_0)
+    @staticmethod
+    def get_update_indices(rdict: "DenseRenderDict", buildings: List["Building"], **id_values: int) -> np.ndarray:
+        keys = rdict.stack_keys([building.rkey for building in buildings], **id_values)
+        demands_0 = rdict.get_items(keys)
+        keys["year"] = keys["year"] + 1
+        demands_1 = rdict.get_items(keys)
+        return demands_1 / demands_0
 
-        for building in buildings:
-            if building.exists and (not building.heating_system.district_heating_available):
-                if random.uniform(0, 1) <= get_district_heating_connection_prob(building.rkey.make_copy()):
-                    building.heating_system.district_heating_available = True
+    def update_buildings_infrastructure_district_heating(self, buildings: "AgentList[Building]"):
+        candidates = [building for building in buildings if building.exists and (not building.heating_system.district_heating_available)]
+        connection_probs = self.get_adoption_probs(self.scenario.s_infrastructure_availability_district_heating, candidates)
+        for building, connection_prob in zip(candidates, connection_probs):
+            if random.uniform(0, 1) <= connection_prob:
+                building.heating_system.district_heating_available = True
 
     def update_buildings_infrastructure_gas_grid(self, buildings: "AgentList[Building]"):
-
-        def get_gas_connection_prob(rkey: "BuildingKey"):
-            connection_rate_1 = self.scenario.s_infrastructure_availability_gas.get_item(rkey)
-            rkey.year = rkey.year - 1
-            connection_rate_0 = self.scenario.s_infrastructure_availability_gas.get_item(rkey)
-            return (connection_rate_1 - connection_rate_0) / (1 - connection_rate_0)
-
-        for building in buildings:
-            if building.exists and (not building.heating_system.gas_available):
-                if random.uniform(0, 1) <= get_gas_connection_prob(building.rkey.make_copy()):
-                    building.heating_system.gas_available = True
+        candidates = [building for building in buildings if building.exists and (not building.heating_system.gas_available)]
+        connection_probs = self.get_adoption_probs(self.scenario.s_infrastructure_availability_gas, candidates)
+        for building, connection_prob in zip(candidates, connection_probs):
+            if random.uniform(0, 1) <= connection_prob:
+                building.heating_system.gas_available = True
 
     def update_buildings_infrastructure_hydrogen_grid(self, buildings: "AgentList[Building]"):
-
-        def get_hydrogen_connection_prob(rkey: "BuildingKey"):
-            connection_rate_1 = self.scenario.s_infrastructure_availability_hydrogen.get_item(rkey)
-            rkey.year = rkey.year - 1
-            connection_rate_0 = self.scenario.s_infrastructure_availability_hydrogen.get_item(rkey)
-            return (connection_rate_1 - connection_rate_0) / (1 - connection_rate_0)
-
-        for building in buildings:
-            if building.exists and (not building.heating_system.hydrogen_available):
-                if random.uniform(0, 1) <= get_hydrogen_connection_prob(building.rkey.make_copy()):
-                    building.heating_system.hydrogen_available = True
+        candidates = [building for building in buildings if building.exists and (not building.heating_system.hydrogen_available)]
+        connection_probs = self.get_adoption_probs(self.scenario.s_infrastructure_availability_hydrogen, candidates)
+        for building, connection_prob in zip(candidates, connection_probs):
+            if random.uniform(0, 1) <= connection_prob:
+                building.heating_system.hydrogen_available = True
 
     def update_buildings_profile_appliance(self, buildings: "AgentList[Building]"):
-
-        def get_update_index():
-            appliance_electricity_rkey = building.rkey.make_copy().set_id({
-                "id_end_use": cons.ID_END_USE_APPLIANCE,
-                "id_energy_carrier": cons.ID_ENERGY_CARRIER_ELECTRICITY
-            })
-            demand_0 = self.scenario.s_end_use_demand_appliance.get_item(rkey=appliance_electricity_rkey)
-            appliance_electricity_rkey.year += 1
-            demand_1 = self.scenario.s_end_use_demand_appliance.get_item(rkey=appliance_electricity_rkey)
-            return demand_1 / demand_0
-
-        for building in buildings:
-            if building.exists:
-                index = get_update_index()
-                if index != 1:
-                    building.appliance_electricity_profile = building.appliance_electricity_profile * index
-                    building.appliance_electricity_demand = building.appliance_electricity_profile.sum()
-                    building.appliance_electricity_demand_per_person = building.appliance_electricity_demand / building.population
+        existing_buildings = [building for building in buildings if building.exists]
+        update_indices = self.get_update_indices(
+            self.scenario.s_end_use_demand_appliance,
+            existing_buildings,
+            id_end_use=cons.ID_END_USE_APPLIANCE,
+            id_energy_carrier=cons.ID_ENERGY_CARRIER_ELECTRICITY
+        )
+        for building, index in zip(existing_buildings, update_indices):
+            if index != 1:
+                building.update_appliance_electricity_profile(index)
 
     def update_buildings_profile_hot_water(self, buildings: "AgentList[Building]"):
-
-        def get_update_index():
-            hot_water_rkey = building.rkey.make_copy()
-            demand_0 = self.scenario.s_end_use_demand_hot_water.get_item(rkey=hot_water_rkey)
-            hot_water_rkey.year += 1
-            demand_1 = self.scenario.s_end_use_demand_hot_water.get_item(rkey=hot_water_rkey)
-            return demand_1 / demand_0
-
-        for building in buildings:
-            if building.exists:
-                index = get_update_index()
-                if index != 1:
-                    building.hot_water_profile = building.hot_water_profile * index
-                    building.hot_water_demand = building.hot_water_profile.sum()
-                    building.hot_water_demand_per_person = building.hot_water_demand / building.population
-                    building.hot_water_demand_per_m2 = building.hot_water_demand / building.total_living_area
+        existing_buildings = [building for building in buildings if building.exists]
+        update_indices = self.get_update_indices(self.scenario.s_end_use_demand_hot_water, existing_buildings)
+        for building, index in zip(existing_buildings, update_indices):
+            if index != 1:
+                building.update_hot_water_profile(index)
 
     def update_buildings_technology_cooling(self, buildings: "AgentList[Building]"):
-
-        def get_cooling_adoption_prob(rkey: "BuildingKey"):
-            penetration_rate_1 = self.scenario.s_cooling_penetration_rate.get_item(rkey)
-            rkey.year = rkey.year - 1
-            penetration_rate_0 = self.scenario.s_cooling_penetration_rate.get_item(rkey)
-            return (penetration_rate_1 - penetration_rate_0) / (1 - penetration_rate_0)
-
-        for building in buildings:
+        adoption_probs = self.get_adoption_probs(self.scenario.s_cooling_penetration_rate, list(buildings))
+        for building, adoption_prob in zip(buildings, adoption_probs):
             not_adopted = not building.cooling_system.is_adopted
-            triggered_to_adopt = random.uniform(0, 1) <= get_cooling_adoption_prob(building.rkey.make_copy())
+            triggered_to_adopt = random.uniform(0, 1) <= adoption_prob
             time_to_replace = building.cooling_system.rkey.year >= building.cooling_system.next_replace_year
             if building.exists and ((not_adopted and triggered_to_adopt) or time_to_replace):
                 building.cooling_system.select(
@@ -191,34 +224,24 @@ class BuildingEnvironment(Environment):
                     cooling_demand=building.cooling_demand,
                 )
                 building.cooling_system.install()
+                building.mark_final_energy_demand_outdated()
 
     def update_buildings_technology_ventilation(self, buildings: "AgentList[Building]"):
-
-        def get_ventilation_adoption_prob(rkey: "BuildingKey"):
-            penetration_rate_1 = self.scenario.s_ventilation_penetration_rate.get_item(rkey)
-            rkey.year = rkey.year - 1
-            penetration_rate_0 = self.scenario.s_ventilation_penetration_rate.get_item(rkey)
-            return (penetration_rate_1 - penetration_rate_0) / (1 - penetration_rate_0)
-
-        for building in buildings:
+        adoption_probs = self.get_adoption_probs(self.scenario.s_ventilation_penetration_rate, list(buildings))
+        for building, adoption_prob in zip(buildings, adoption_probs):
             not_adopted = not building.ventilation_system.is_adopted
-            triggered_to_adopt = random.uniform(0, 1) <= get_ventilation_adoption_prob(building.rkey.make_copy())
+            triggered_to_adopt = random.uniform(0, 1) <= adoption_prob
             time_to_replace = building.ventilation_system.rkey.year >= building.ventilation_system.next_replace_year
             if building.exists and ((not_adopted and triggered_to_adopt) or time_to_replace):
                 building.ventilation_system.select(total_living_area=building.total_living_area)
                 building.ventilation_system.install()
+                building.mark_final_energy_demand_outdated()
 
     def update_buildings_technology_pv(self, buildings: "AgentList[Building]"):
-
-        def get_pv_adoption_prob(rkey: "BuildingKey"):
-            penetration_rate_1 = self.scenario.s_pv_penetration_rate.get_item(rkey)
-            rkey.year = rkey.year - 1
-            penetration_rate_0 = self.scenario.s_pv_penetration_rate.get_item(rkey)
-            return (penetration_rate_1 - penetration_rate_0) / (1 - penetration_rate_0)
-
-        for building in buildings:
+        adoption_probs = self.get_adoption_probs(self.scenario.s_pv_penetration_rate, list(buildings))
+        for building, adoption_prob in zip(buildings, adoption_probs):
             not_adopted = not building.pv_system.is_adopted
-            triggered_to_adopt = random.uniform(0, 1) <= get_pv_adoption_prob(building.rkey.make_copy())
+            triggered_to_adopt = random.uniform(0, 1) <= adoption_prob
             if building.exists and (not_adopted and triggered_to_adopt):
                 building.pv_system.init_adoption(
                     roof_area=building.building_components["roof"].area,
@@ -231,6 +254,7 @@ class BuildingEnvironment(Environment):
             if building.exists and building.radiator.rkey.year >= building.radiator.next_replace_year:
                 building.radiator.select(id_building_action=2)
                 building.radiator.install()
+                building.mark_final_energy_demand_outdated()
                 for heating_technology in [
                     building.heating_system.heating_technology_main,
                     building.heating_system.heating_technology_second
@@ -239,7 +263,6 @@ class BuildingEnvironment(Environment):
                         heating_technology.update_due_to_radiator_change(id_radiator=building.radiator.rkey.id_radiator)
 
     def update_buildings_technology_heating(self, buildings: "AgentList[Building]"):
-
         # mandatory modernization of the main heating technology due to requirement of renewable percentage
         if self.scenario.heating_technology_mandatory:
             for building in buildings:
@@ -330,7 +353,7 @@ class BuildingEnvironment(Environment):
 
     def record_renovation_action_info(self, building: "Building", component_name: str, before_renovation_status: dict, reason: str, id_building_action: int):
         building_component = building.building_components[component_name]
-        rkey = building_component.rkey.make_copy().set_id({"id_building_action": id_building_action})
+        rkey = building_component.rkey.with_(id_building_action=id_building_action)
         capex = self.scenario.building_component_capex.get_item(rkey) * building_component.area
         total_investment = capex * self.scenario.s_building_component_cost_payback_time.get_item(rkey)
         subsidy_percentage = self.scenario.s_subsidy_building_renovation.get_item(rkey)
@@ -431,7 +454,7 @@ class BuildingEnvironment(Environment):
             id_subsector=cons.ID_SUBSECTOR_RESIDENTIAL,
             year=self.year
         )
-        rkey_next_year = rkey_this_year.make_copy().set_id({"year": self.year + 1})
+        rkey_next_year = rkey_this_year.with_(year=self.year + 1)
         for id_unit_user_type in self.scenario.r_subsector_unit_user_type.get_item(rkey_this_year):
             rkey_this_year.id_unit_user_type = id_unit_user_type
             rkey_next_year.id_unit_user_type = id_unit_user_type
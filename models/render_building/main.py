@@ -1,8 +1,11 @@
-from typing import Optional
+from typing import List, Optional
 
 from Melodie import Config
 from Melodie import Simulator
 
+from models.render.shared_tables import share_scenario_tables
+from models.render.shared_tables import unshare_scenario_tables
+from models.render_building.building_r5c1 import precompile_r5c1_kernels
 from models.render_building.model import BuildingModel
 from models.render_building.scenario import BuildingScenario
 
@@ -16,5 +19,27 @@ def run_building_model(cfg: "Config", cores: Optional[int] = None):
     if cores is None or cores == 1:
         simulator.run()
     else:
-        simulator.new_parallel(cores=cores)
-        # simulator.run_parallel(cores=cores)
+        # compile the r5c1 kernels once before the processes are started
+        precompile_r5c1_kernels()
+        # the scenario and profile tables are loaded once and shared with the processes, see `models.render.shared_tables`
+        share_scenario_tables(simulator)
+        try:
+            simulator.new_parallel(cores=cores)
+            # simulator.run_parallel(cores=cores)
+        finally:
+            unshare_scenario_tables(cfg)
+
+
+def compile_building_scenarios(cfg: "Config", rows: Optional[List[int]] = None):
+    # compiles the scenario bundles of the rows in SimulatorScenarios (by position, all rows by default), which are then opened by
+    # `BuildingScenario.setup_scenario_data` instead of loading the input data, see `models.render.scenario_bundle`.
+    # The rows sharing a bundle (e.g., the regions of a country) and the rows with an up-to-date bundle are not compiled again.
+    simulator = Simulator(
+        config=cfg,
+        model_cls=BuildingModel,
+        scenario_cls=BuildingScenario
+    )
+    simulator.subworker_prerun()
+    for row, scenario in enumerate(simulator.scenarios):
+        if rows is None or row in rows:
+            scenario.compile_bundle()
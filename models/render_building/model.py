@@ -24,6 +24,9 @@ class BuildingModel(RenderModel):
     def setup(self):
         self.scenario.setup_scenario_data()
         self.buildings.setup_agents(agents_num=len(self.scenario.agent_params), params_df=self.scenario.agent_params)
+        if self.scenario.render_dict_stats is not None:
+            self.scenario.render_dict_stats.instrument_stages(self.environment, prefixes=("setup_", "calc_", "count_", "update_", "construct_"))
+            self.scenario.render_dict_stats.instrument_stages(self.data_collector, prefixes=("collect_", "export_"))
 
     def run(self):
         self.environment.setup_buildings(self.buildings)
@@ -49,6 +52,11 @@ class BuildingModel(RenderModel):
             self.environment.update_buildings_energy_demand_and_cost(self.buildings)
             self.data_collector.collect_building_stock(self.buildings)
         self.data_collector.export_result_data()
+        self.scenario.r5c1_cache.log_statistics()
+        self.scenario.log_table_report()
+        if self.scenario.render_dict_stats is not None:
+            self.data_collector.save_dataframe(df=self.scenario.render_dict_stats.get_report(), df_name="render_dict_stats")
+            self.scenario.render_dict_stats.log_report()
 
 
 
@@ -1,18 +1,213 @@
+from typing import List, Set, TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 
+from models.render.key_grid import KeyGrid
+from models.render.precision import set_profile_precision
 from models.render.render_dict import RenderDict
+from models.render.render_dict import convert_id_region
 from models.render.scenario import RenderScenario
+from models.render_building import cons
 from models.render_building.building_key import BuildingKey
+from models.render_building.building_r5c1 import R5C1Cache
 from utils.decorators import timer
 
+if TYPE_CHECKING:
+    from models.render.shared_tables import SharedTableStore
+
 
 class BuildingScenario(RenderScenario):
+    input_tables = {
+        "load_id": {
+            "building_actions": ("ID_Building_Action.xlsx", {}),
+            "building_construction_periods": ("ID_Building_ConstructionPeriod.xlsx", {}),
+            "building_heights": ("ID_Building_Height.xlsx", {}),
+            "building_locations": ("ID_Building_Location.xlsx", {}),
+            "building_ownerships": ("ID_Building_Ownership.xlsx", {}),
+            "building_types": ("ID_Building_Type.xlsx", {}),
+            "building_components": ("ID_BuildingComponent.xlsx", {}),
+            "building_component_options": ("ID_BuildingComponent_Option.xlsx", {}),
+            "building_component_option_efficiency_classes": ("ID_BuildingComponent_Option_EfficiencyClass.xlsx", {}),
+            "building_efficiency_classes": ("ID_Building_EfficiencyClass.xlsx", {}),
+            "end_uses": ("ID_EndUse.xlsx", {}),
+            "orientations": ("ID_Orientation.xlsx", {}),
+            "unit_user_types": ("ID_UnitUserType.xlsx", {}),
+            "dwelling_ownerships": ("ID_DwellingOwnership.xlsx", {}),
+            "heating_systems": ("ID_HeatingSystem.xlsx", {}),
+            "heating_system_actions": ("ID_HeatingSystem_Action.xlsx", {}),
+            "heating_technologies": ("ID_HeatingTechnology.xlsx", {}),
+            "radiators": ("ID_Radiator.xlsx", {}),
+            "cooling_technologies": ("ID_CoolingTechnology.xlsx", {}),
+            "cooling_technology_efficiency_classes": ("ID_CoolingTechnology_EfficiencyClass.xlsx", {}),
+            "ventilation_technologies": ("ID_VentilationTechnology.xlsx", {}),
+            "ventilation_technology_efficiency_classes": ("ID_VentilationTechnology_EfficiencyClass.xlsx", {}),
+        },
+        "load_relation": {
+            "r_building_component_option": ("Relation_BuildingComponent_Option.xlsx", {}),
+            "r_building_type_height": ("Relation_BuildingType_Height.xlsx", {}),
+            "r_subsector_building_type": ("Relation_SubSector_BuildingType.xlsx", {}),
+            "r_subsector_unit_user_type": ("Relation_SubSector_UnitUserType.xlsx", {}),
+            "r_sector_heating_system": ("Relation_Sector_HeatingSystem.xlsx", {}),
+            "r_heating_system_technology_main": ("Relation_HeatingSystem_HeatingTechnologyMain.xlsx", {}),
+            "r_heating_technology_energy_carrier": ("Relation_HeatingTechnology_EnergyCarrier.xlsx", {}),
+            "r_cooling_technology_efficiency_class": ("Relation_CoolingTechnology_EfficiencyClass.xlsx", {}),
+            "r_cooling_technology_energy_carrier": ("Relation_CoolingTechnology_EnergyCarrier.xlsx", {}),
+            "r_ventilation_technology_efficiency_class": ("Relation_VentilationTechnology_EfficiencyClass.xlsx", {}),
+            "r_ventilation_technology_energy_carrier": ("Relation_VentilationTechnology_EnergyCarrier.xlsx", {}),
+        },
+        "load_param": {
+            "p_building_coverage": ("Parameter_Building_Coverage.xlsx", {}),
+            "p_building_action_probability": ("Parameter_Building_ActionProbability.xlsx", {}),
+            "p_building_component_efficiency": ("Parameter_BuildingComponent_EfficiencyCoefficient.xlsx", {}),
+            "p_building_height_min": ("Parameter_Building_Height.xlsx", {"col": "min"}),
+            "p_building_height_max": ("Parameter_Building_Height.xlsx", {"col": "max"}),
+            "p_building_unit_number_min": ("Parameter_Building_UnitNumber.xlsx", {"col": "min"}),
+            "p_building_unit_number_max": ("Parameter_Building_UnitNumber.xlsx", {"col": "max"}),
+            "p_building_supply_temperature_space_heating": ("Parameter_Building_SupplyTemperature.xlsx", {"col": "space_heating"}),
+            "p_building_supply_temperature_hot_water": ("Parameter_Building_SupplyTemperature.xlsx", {"col": "hot_water"}),
+            "p_building_construction_year_min": ("Parameter_Building_ConstructionYear.xlsx", {"col": "min"}),
+            "p_building_construction_year_max": ("Parameter_Building_ConstructionYear.xlsx", {"col": "max"}),
+            "p_building_lifetime_min": ("Parameter_Building_Lifetime.xlsx", {"col": "min", "region_level": 0}),
+            "p_building_lifetime_max": ("Parameter_Building_Lifetime.xlsx", {"col": "max", "region_level": 0}),
+            "p_building_component_minimum_lifetime": ("Parameter_BuildingComponent_MinimumLifetime.xlsx", {}),
+            "p_building_component_postponing_lifetime": ("Parameter_BuildingComponent_PostponingLifetime.xlsx", {}),
+            "p_building_envelope_component_area_ref": ("Parameter_Building_Envelope_ComponentArea.xlsx", {"col": "reference", "region_level": 0}),
+            "p_building_envelope_component_area_ratio": ("Parameter_Building_Envelope_ComponentArea.xlsx", {"col": "ratio", "region_level": 0}),
+            "p_building_envelope_window_area_orientation": ("Parameter_Building_Envelope_WindowAreaOrientation.xlsx", {"region_level": 0}),
+            "p_building_rc_appliance_internal_gain": ("Parameter_Building_RC_ApplianceInternalGain.xlsx", {}),
+            "p_radiator_lifetime_min": ("Parameter_Radiator_Lifetime.xlsx", {"col": "min"}),
+            "p_radiator_lifetime_max": ("Parameter_Radiator_Lifetime.xlsx", {"col": "max"}),
+            "p_unit_user_person_number": ("Parameter_UnitUser_PersonNumber.xlsx", {}),
+            "p_set_temperature_occupied_min": ("Parameter_SetTemperature.xlsx", {"col": "occupied_min"}),
+            "p_set_temperature_occupied_max": ("Parameter_SetTemperature.xlsx", {"col": "occupied_max"}),
+            "p_set_temperature_empty_min": ("Parameter_SetTemperature.xlsx", {"col": "empty_min"}),
+            "p_set_temperature_empty_max": ("Parameter_SetTemperature.xlsx", {"col": "empty_max"}),
+            "p_heating_technology_lifetime_min": ("Parameter_HeatingTechnology_Lifetime.xlsx", {"col": "min"}),
+            "p_heating_technology_lifetime_max": ("Parameter_HeatingTechnology_Lifetime.xlsx", {"col": "max"}),
+            "p_heating_technology_second_contribution_space_heating": ("Parameter_HeatingTechnology_Second_Contribution.xlsx", {"col": "space_heating"}),
+            "p_heating_technology_second_contribution_hot_water": ("Parameter_HeatingTechnology_Second_Contribution.xlsx", {"col": "hot_water"}),
+            "p_heating_technology_supply_temperature_efficiency_adjustment": ("Parameter_HeatingTechnology_SupplyTemperatureEfficiencyAdjustment.xlsx", {}),
+            "p_heating_technology_cost_multiplier_material": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "multiplier_material_cost"}),
+            "p_heating_technology_cost_exponent_material": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "exponent_material_cost"}),
+            "p_heating_technology_cost_share_multiplier_material": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "multiplier_material_share"}),
+            "p_heating_technology_cost_share_exponent_material": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "exponent_material_share"}),
+            "p_heating_technology_cost_learning_coefficient": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "learning_coefficient"}),
+            "p_heating_technology_cost_multiplier_om": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "multiplier_om_cost"}),
+            "p_heating_technology_cost_exponent_om": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "exponent_om_cost"}),
+            "p_heating_technology_cost_criterion_small": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "criterion_small"}),
+            "p_heating_technology_cost_pp_index": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "pp_index"}),
+            "p_heating_technology_cost_wages_index": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "wages_index"}),
+            "p_heating_technology_cost_payback_time": ("Parameter_HeatingTechnology_Cost.xlsx", {"region_level": 0, "col": "payback_time"}),
+            "p_heating_technology_size_quantile": ("Parameter_HeatingTechnology_SizeQuantile.xlsx", {}),
+            "p_cooling_technology_lifetime_min": ("Parameter_CoolingTechnology_Lifetime.xlsx", {"col": "min"}),
+            "p_cooling_technology_lifetime_max": ("Parameter_CoolingTechnology_Lifetime.xlsx", {"col": "max"}),
+            "p_cooling_technology_efficiency": ("Parameter_CoolingTechnology_EfficiencyCoefficient.xlsx", {}),
+            "p_ventilation_technology_lifetime_min": ("Parameter_VentilationTechnology_Lifetime.xlsx", {"col": "min"}),
+            "p_ventilation_technology_lifetime_max": ("Parameter_VentilationTechnology_Lifetime.xlsx", {"col": "max"}),
+            "p_ventilation_technology_energy_intensity": ("Parameter_VentilationTechnology_EnergyIntensity.xlsx", {}),
+        },
+        "load_dataframe": {
+            "p_building_component_lifetime": ("Parameter_BuildingComponent_Lifetime.xlsx", {}),
+            "p_building_efficiency_class_intensity": ("Parameter_Building_EfficiencyClass_Intensity.xlsx", {}),
+            "p_renovation_sync_probability": ("Parameter_Renovation_SyncProbability.xlsx", {}),
+            "s_heating_technology_second": ("Scenario_HeatingTechnology_Second.xlsx", {}),
+            "s_end_use_demand_appliance_df": ("Scenario_EndUseDemand_Appliance.xlsx", {}),
+        },
+        "load_profile": {
+            "pr_building_occupancy": ("Profile_BuildingOccupancy.xlsx", {"scenario_filter": "id_scenario_teleworking"}),
+            "pr_appliance_electricity": ("Profile_ApplianceElectricity.xlsx", {"scenario_filter": "id_scenario_teleworking"}),
+            "pr_hot_water": ("Profile_HotWater.xlsx", {"scenario_filter": "id_scenario_teleworking"}),
+            "pr_weather_temperature": ("Profile_WeatherTemperature.xlsx", {"region_level": 2}),
+            "pr_weather_radiation": ("Profile_WeatherRadiation.xlsx", {"region_level": 2}),
+            "pr_pv_generation": ("Profile_PVGeneration.xlsx", {"region_level": 2}),
+        },
+        "load_scenario": {
+            "s_building": ("Scenario_Building.xlsx", {}),
+            "s_building_construction_period": ("Scenario_Building_ConstructionPeriod.xlsx", {}),
+            "s_building_height": ("Scenario_Building_Height.xlsx", {}),
+            "s_building_location": ("Scenario_Building_Location.xlsx", {}),
+            "s_building_ownership": ("Scenario_Building_Ownership.xlsx", {}),
+            "s_building_unit_area": ("Scenario_Building_UnitArea.xlsx", {"region_level": 0}),
+            "s_building_component_option": ("Scenario_BuildingComponent_Option.xlsx", {"region_level": 0}),
+            "s_building_component_availability": ("Scenario_BuildingComponent_Availability.xlsx", {"region_level": 0, "all_years": True, "scenario_filter": "id_scenario_building_component_availability"}),
+            "s_building_component_cost_material": ("Scenario_BuildingComponent_Cost_Material.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_building_component_cost_material"}),
+            "s_building_component_cost_labor": ("Scenario_BuildingComponent_Cost_Labor.xlsx", {"region_level": 0, "all_years": True}),
+            "s_building_component_cost_payback_time": ("Scenario_BuildingComponent_Cost_PaybackTime.xlsx", {"region_level": 0}),
+            "s_building_component_input_labor": ("Scenario_BuildingComponent_Input_Labor.xlsx", {"region_level": 0, "all_years": True, "scenario_filter": "id_scenario_building_component_input_labor"}),
+            "s_building_component_utility_power": ("Scenario_BuildingComponent_UtilityPower.xlsx", {"region_level": 0}),
+            "s_unit_user": ("Scenario_UnitUser.xlsx", {"region_level": 2, "all_years": True, "scenario_filter": "id_scenario_unit_user"}),
+            "s_unit_user_dwelling_ownership": ("Scenario_UnitUser_DwellingOwnership.xlsx", {"region_level": 2}),
+            "s_heating_system": ("Scenario_HeatingSystem.xlsx", {}),
+            "s_heating_system_minimum_renewable_percentage": ("Scenario_HeatingSystem_MinimumRenewablePercentage.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_heating_technology_mandatory"}),
+            "s_heating_technology_main": ("Scenario_HeatingTechnology_Main.xlsx", {"region_level": 0}),
+            "s_heating_technology_efficiency": ("Scenario_HeatingTechnology_EfficiencyCoefficient.xlsx", {"all_years": True, "scenario_filter": "id_scenario_tech_efficiency"}),
+            "s_heating_technology_availability": ("Scenario_HeatingTechnology_Availability.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_heating_technology_availability"}),
+            "s_heating_technology_input_labor": ("Scenario_HeatingTechnology_Input_Labor.xlsx", {"region_level": 0}),
+            "s_heating_technology_utility_power": ("Scenario_HeatingTechnology_UtilityPower.xlsx", {"region_level": 0}),
+            "s_infrastructure_availability_district_heating": ("Scenario_Infrastructure_Availability_DistrictHeating.xlsx", {"all_years": True, "scenario_filter": "id_scenario_dh_availability"}),
+            "s_infrastructure_availability_gas": ("Scenario_Infrastructure_Availability_Gas.xlsx", {"all_years": True, "scenario_filter": "id_scenario_gas_availability"}),
+            "s_infrastructure_availability_hydrogen": ("Scenario_Infrastructure_Availability_Hydrogen.xlsx", {"all_years": True, "scenario_filter": "id_scenario_hydrogen_availability"}),
+            "s_radiator": ("Scenario_Radiator.xlsx", {"region_level": 0}),
+            "s_radiator_availability": ("Scenario_Radiator_Availability.xlsx", {"region_level": 0}),
+            "s_radiator_cost_material": ("Scenario_Radiator_Cost_Material.xlsx", {"region_level": 0}),
+            "s_radiator_cost_labor": ("Scenario_Radiator_Cost_Labor.xlsx", {"region_level": 0}),
+            "s_radiator_cost_payback_time": ("Scenario_Radiator_Cost_PaybackTime.xlsx", {"region_level": 0}),
+            "s_radiator_input_labor": ("Scenario_Radiator_Input_Labor.xlsx", {"region_level": 0}),
+            "s_radiator_utility_power": ("Scenario_Radiator_UtilityPower.xlsx", {"region_level": 0}),
+            "s_cooling_penetration_rate": ("Scenario_Cooling_PenetrationRate.xlsx", {"region_level": 0, "all_years": True}),
+            "s_cooling_technology_market_share": ("Scenario_CoolingTechnology_MarketShare.xlsx", {"region_level": 0}),
+            "s_cooling_technology_efficiency_class_market_share": ("Scenario_CoolingTechnology_EfficiencyClass_MarketShare.xlsx", {"region_level": 0}),
+            "s_cooling_technology_availability": ("Scenario_CoolingTechnology_Availability.xlsx", {"region_level": 0}),
+            "s_cooling_technology_cost_material": ("Scenario_CoolingTechnology_Cost_Material.xlsx", {"region_level": 0}),
+            "s_cooling_technology_cost_om": ("Scenario_CoolingTechnology_Cost_OM.xlsx", {"region_level": 0}),
+            "s_cooling_technology_cost_labor": ("Scenario_CoolingTechnology_Cost_Labor.xlsx", {"region_level": 0}),
+            "s_cooling_technology_cost_payback_time": ("Scenario_CoolingTechnology_Cost_PaybackTime.xlsx", {"region_level": 0}),
+            "s_cooling_technology_input_labor": ("Scenario_CoolingTechnology_Input_Labor.xlsx", {"region_level": 0}),
+            "s_cooling_technology_utility_power": ("Scenario_CoolingTechnology_UtilityPower.xlsx", {"region_level": 0}),
+            "s_ventilation_penetration_rate": ("Scenario_Ventilation_PenetrationRate.xlsx", {"region_level": 0, "all_years": True}),
+            "s_ventilation_technology_market_share": ("Scenario_VentilationTechnology_MarketShare.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_efficiency_class_market_share": ("Scenario_VentilationTechnology_EfficiencyClass_MarketShare.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_availability": ("Scenario_VentilationTechnology_Availability.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_cost_material": ("Scenario_VentilationTechnology_Cost_Material.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_cost_om": ("Scenario_VentilationTechnology_Cost_OM.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_cost_labor": ("Scenario_VentilationTechnology_Cost_Labor.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_cost_payback_time": ("Scenario_VentilationTechnology_Cost_PaybackTime.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_input_labor": ("Scenario_VentilationTechnology_Input_Labor.xlsx", {"region_level": 0}),
+            "s_ventilation_technology_utility_power": ("Scenario_VentilationTechnology_UtilityPower.xlsx", {"region_level": 0}),
+            "s_pv_penetration_rate": ("Scenario_PV_PenetrationRate.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_pv_penetration_rate", "all_years": True}),
+            "s_pv_self_consumption_rate": ("Scenario_PV_SelfConsumptionRate.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_pv_self_consumption_rate"}),
+            "s_end_use_demand_appliance": ("Scenario_EndUseDemand_Appliance.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_teleworking", "all_years": True}),
+            "s_end_use_demand_hot_water": ("Scenario_EndUseDemand_HotWater.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_teleworking", "all_years": True}),
+            "s_interest_rate": ("Scenario_InterestRate.xlsx", {"region_level": 0}),
+            "s_construction_residential_building": ("Scenario_Construction_ResidentialBuilding.xlsx", {}),
+            "s_construction_mandatory_renewable_heating": ("Scenario_Construction_MandatoryRenewableHeating.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_construction_mandatory_renewable_heating"}),
+            "s_construction_pv_adoption_rate": ("Scenario_Construction_PVAdoptionRate.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_construction_pv_adoption_rate"}),
+            "s_renovation_maximum_heating_intensity": ("Scenario_Renovation_MaximumHeatingIntensity.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_renovation_mandatory"}),
+            "s_subsidy_building_renovation": ("Scenario_Subsidy_BuildingRenovation.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_subsidy_building_renovation"}),
+            "s_subsidy_heating_modernization": ("Scenario_Subsidy_HeatingModernization.xlsx", {"region_level": 0, "scenario_filter": "id_scenario_subsidy_heating_modernization"}),
+        },
+    }
+
+    cost_tables = [
+        "building_component_capex",
+        "heating_technology_energy_cost",
+        "radiator_capex",
+        "cooling_technology_capex",
+        "cooling_technology_opex",
+        "ventilation_technology_capex",
+        "ventilation_technology_opex",
+    ]
 
     def setup(self):
         self.start_year = 0
         self.end_year = 0
         self.id_region = 0
         self.optimal_heating_behavior_prob = 0
+        self.r5c1_representative_days = 0  # 0: full-year r5c1 calculation; n > 0: n representative days
+        self.profile_precision = 64  # 32 or 64, see `models.render.precision`
+        self.render_dict_instrumentation = 0  # 1: count and time the RenderDict calls, see `models.render.instrumentation`
+        self.input_loading_workers = 0  # 0: one worker per cpu core; 1: sequential loading, see `RenderScenario.load_tables`
         self.id_scenario_energy_price_wholesale = 0
         self.id_scenario_energy_price_tax_rate = 0
         self.id_scenario_energy_price_mark_up = 0
@@ -38,192 +233,36 @@ class BuildingScenario(RenderScenario):
         self.heating_technology_mandatory = 0
 
     def setup_scenario_data(self):
-        self.load_input_data()
+        set_profile_precision(int(self.profile_precision))
+        # the compiled scenario bundle is used if available, see `compile_building_scenarios`
+        if not self.open_bundle():
+            self.load_input_data(workers=int(self.input_loading_workers))
         self.setup_agent_params()
-        self.setup_cost_data()
         self.create_data_containers()
+        self.render_dict_stats = self.instrument_render_dicts() if self.render_dict_instrumentation else None
 
-    """
-    load input data
-    """
-    def load_input_data(self):
-        self.load_framework()
-        self.load_ids()
-        self.load_relations()
-        self.load_params()
-        self.load_profiles()
-        self.load_scenarios()
-
-    def load_ids(self):
-        self.building_actions = self.load_id("ID_Building_Action.xlsx")
-        self.building_construction_periods = self.load_id("ID_Building_ConstructionPeriod.xlsx")
-        self.building_heights = self.load_id("ID_Building_Height.xlsx")
-        self.building_locations = self.load_id("ID_Building_Location.xlsx")
-        self.building_ownerships = self.load_id("ID_Building_Ownership.xlsx")
-        self.building_types = self.load_id("ID_Building_Type.xlsx")
-        self.building_components = self.load_id("ID_BuildingComponent.xlsx")
-        self.building_component_options = self.load_id("ID_BuildingComponent_Option.xlsx")
-        self.building_component_option_efficiency_classes = self.load_id("ID_BuildingComponent_Option_EfficiencyClass.xlsx")
-        self.building_efficiency_classes = self.load_id("ID_Building_EfficiencyClass.xlsx")
-        self.end_uses = self.load_id("ID_EndUse.xlsx")
-        self.orientations = self.load_id("ID_Orientation.xlsx")
-        self.unit_user_types = self.load_id("ID_UnitUserType.xlsx")
-        self.dwelling_ownerships = self.load_id("ID_DwellingOwnership.xlsx")
-        self.heating_systems = self.load_id("ID_HeatingSystem.xlsx")
-        self.heating_system_actions = self.load_id("ID_HeatingSystem_Action.xlsx")
-        self.heating_technologies = self.load_id("ID_HeatingTechnology.xlsx")
-        self.radiators = self.load_id("ID_Radiator.xlsx")
-        self.cooling_technologies = self.load_id("ID_CoolingTechnology.xlsx")
-        self.cooling_technology_efficiency_classes = self.load_id("ID_CoolingTechnology_EfficiencyClass.xlsx")
-        self.ventilation_technologies = self.load_id("ID_VentilationTechnology.xlsx")
-        self.ventilation_technology_efficiency_classes = self.load_id("ID_VentilationTechnology_EfficiencyClass.xlsx")
-
-    def load_relations(self):
-        self.r_building_component_option = self.load_relation("Relation_BuildingComponent_Option.xlsx")
-        self.r_building_type_height = self.load_relation("Relation_BuildingType_Height.xlsx")
-        self.r_subsector_building_type = self.load_relation("Relation_SubSector_BuildingType.xlsx")
-        self.r_subsector_unit_user_type = self.load_relation("Relation_SubSector_UnitUserType.xlsx")
-        self.r_sector_heating_system = self.load_relation("Relation_Sector_HeatingSystem.xlsx")
-        self.r_heating_system_technology_main = self.load_relation("Relation_HeatingSystem_HeatingTechnologyMain.xlsx")
-        self.r_heating_technology_energy_carrier = self.load_relation("Relation_HeatingTechnology_EnergyCarrier.xlsx")
-        self.r_cooling_technology_efficiency_class = self.load_relation("Relation_CoolingTechnology_EfficiencyClass.xlsx")
-        self.r_cooling_technology_energy_carrier = self.load_relation("Relation_CoolingTechnology_EnergyCarrier.xlsx")
-        self.r_ventilation_technology_efficiency_class = self.load_relation("Relation_VentilationTechnology_EfficiencyClass.xlsx")
-        self.r_ventilation_technology_energy_carrier = self.load_relation("Relation_VentilationTechnology_EnergyCarrier.xlsx")
-
-    def load_params(self):
-        # RenderDict
-        self.p_building_coverage = self.load_param("Parameter_Building_Coverage.xlsx")
-        self.p_building_action_probability = self.load_param("Parameter_Building_ActionProbability.xlsx")
-        self.p_building_component_efficiency = self.load_param("Parameter_BuildingComponent_EfficiencyCoefficient.xlsx")
-        self.p_building_height_min = self.load_param("Parameter_Building_Height.xlsx", col="min")
-        self.p_building_height_max = self.load_param("Parameter_Building_Height.xlsx", col="max")
-        self.p_building_unit_number_min = self.load_param("Parameter_Building_UnitNumber.xlsx", col="min")
-        self.p_building_unit_number_max = self.load_param("Parameter_Building_UnitNumber.xlsx", col="max")
-        self.p_building_supply_temperature_space_heating = self.load_param("Parameter_Building_SupplyTemperature.xlsx", col="space_heating")
-        self.p_building_supply_temperature_hot_water = self.load_param("Parameter_Building_SupplyTemperature.xlsx", col="hot_water")
-        self.p_building_construction_year_min = self.load_param("Parameter_Building_ConstructionYear.xlsx", col="min")
-        self.p_building_construction_year_max = self.load_param("Parameter_Building_ConstructionYear.xlsx", col="max")
-        self.p_building_lifetime_min = self.load_param("Parameter_Building_Lifetime.xlsx", col="min", region_level=0)
-        self.p_building_lifetime_max = self.load_param("Parameter_Building_Lifetime.xlsx", col="max", region_level=0)
-        self.p_building_component_minimum_lifetime = self.load_param("Parameter_BuildingComponent_MinimumLifetime.xlsx")
-        self.p_building_component_postponing_lifetime = self.load_param("Parameter_BuildingComponent_PostponingLifetime.xlsx")
-        self.p_building_envelope_component_area_ref = self.load_param("Parameter_Building_Envelope_ComponentArea.xlsx", col='reference', region_level=0)
-        self.p_building_envelope_component_area_ratio = self.load_param("Parameter_Building_Envelope_ComponentArea.xlsx", col='ratio', region_level=0)
-        self.p_building_envelope_window_area_orientation = self.load_param("Parameter_Building_Envelope_WindowAreaOrientation.xlsx", region_level=0)
-        self.p_building_rc_appliance_internal_gain = self.load_param("Parameter_Building_RC_ApplianceInternalGain.xlsx")
-        self.p_radiator_lifetime_min = self.load_param("Parameter_Radiator_Lifetime.xlsx", col="min")
-        self.p_radiator_lifetime_max = self.load_param("Parameter_Radiator_Lifetime.xlsx", col="max")
-        self.p_unit_user_person_number = self.load_param("Parameter_UnitUser_PersonNumber.xlsx")
-        self.p_set_temperature_occupied_min = self.load_param("Parameter_SetTemperature.xlsx", col="occupied_min")
-        self.p_set_temperature_occupied_max = self.load_param("Parameter_SetTemperature.xlsx", col="occupied_max")
-        self.p_set_temperature_empty_min = self.load_param("Parameter_SetTemperature.xlsx", col="empty_min")
-        self.p_set_temperature_empty_max = self.load_param("Parameter_SetTemperature.xlsx", col="empty_max")
-        self.p_heating_technology_lifetime_min = self.load_param("Parameter_HeatingTechnology_Lifetime.xlsx", col="min")
-        self.p_heating_technology_lifetime_max = self.load_param("Parameter_HeatingTechnology_Lifetime.xlsx", col="max")
-        self.p_heating_technology_second_contribution_space_heating = self.load_param("Parameter_HeatingTechnology_Second_Contribution.xlsx", col="space_heating")
-        self.p_heating_technology_second_contribution_hot_water = self.load_param("Parameter_HeatingTechnology_Second_Contribution.xlsx", col="hot_water")
-        self.p_heating_technology_supply_temperature_efficiency_adjustment = self.load_param("Parameter_HeatingTechnology_SupplyTemperatureEfficiencyAdjustment.xlsx")
-        self.p_heating_technology_cost_multiplier_material = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="multiplier_material_cost")
-        self.p_heating_technology_cost_exponent_material = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="exponent_material_cost")
-        self.p_heating_technology_cost_share_multiplier_material = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="multiplier_material_share")
-        self.p_heating_technology_cost_share_exponent_material = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="exponent_material_share")
-        self.p_heating_technology_cost_learning_coefficient = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="learning_coefficient")
-        self.p_heating_technology_cost_multiplier_om = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="multiplier_om_cost")
-        self.p_heating_technology_cost_exponent_om = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="exponent_om_cost")
-        self.p_heating_technology_cost_criterion_small = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="criterion_small")
-        self.p_heating_technology_cost_pp_index = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="pp_index")
-        self.p_heating_technology_cost_wages_index = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="wages_index")
-        self.p_heating_technology_cost_payback_time = self.load_param("Parameter_HeatingTechnology_Cost.xlsx", region_level=0, col="payback_time")
-        self.p_heating_technology_size_quantile = self.load_param("Parameter_HeatingTechnology_SizeQuantile.xlsx")
-        self.p_cooling_technology_lifetime_min = self.load_param("Parameter_CoolingTechnology_Lifetime.xlsx", col="min")
-        self.p_cooling_technology_lifetime_max = self.load_param("Parameter_CoolingTechnology_Lifetime.xlsx", col="max")
-        self.p_cooling_technology_efficiency = self.load_param("Parameter_CoolingTechnology_EfficiencyCoefficient.xlsx")
-        self.p_ventilation_technology_lifetime_min = self.load_param("Parameter_VentilationTechnology_Lifetime.xlsx", col="min")
-        self.p_ventilation_technology_lifetime_max = self.load_param("Parameter_VentilationTechnology_Lifetime.xlsx", col="max")
-        self.p_ventilation_technology_energy_intensity = self.load_param("Parameter_VentilationTechnology_EnergyIntensity.xlsx")
-        # DataFrame
-        self.p_building_component_lifetime = self.load_dataframe("Parameter_BuildingComponent_Lifetime.xlsx")
-        self.p_building_efficiency_class_intensity = self.load_dataframe("Parameter_Building_EfficiencyClass_Intensity.xlsx")
-        self.p_renovation_sync_probability = self.load_dataframe("Parameter_Renovation_SyncProbability.xlsx")
-
-    def load_profiles(self):
-        self.pr_building_occupancy = self.load_profile("Profile_BuildingOccupancy.xlsx", scenario_filter="id_scenario_teleworking")
-        self.pr_appliance_electricity = self.load_profile("Profile_ApplianceElectricity.xlsx", scenario_filter="id_scenario_teleworking")
-        self.pr_hot_water = self.load_profile("Profile_HotWater.xlsx", scenario_filter="id_scenario_teleworking")
-        self.pr_weather_temperature = self.load_profile("Profile_WeatherTemperature.xlsx", region_level=2)
-        self.pr_weather_radiation = self.load_profile("Profile_WeatherRadiation.xlsx", region_level=2)
-        self.pr_pv_generation = self.load_profile("Profile_PVGeneration.xlsx", region_level=2)
-
-    def load_scenarios(self):
-        # RenderDict
-        self.s_building = self.load_scenario("Scenario_Building.xlsx")
-        self.s_building_construction_period = self.load_scenario("Scenario_Building_ConstructionPeriod.xlsx")
-        self.s_building_height = self.load_scenario("Scenario_Building_Height.xlsx")
-        self.s_building_location = self.load_scenario("Scenario_Building_Location.xlsx")
-        self.s_building_ownership = self.load_scenario("Scenario_Building_Ownership.xlsx")
-        self.s_building_unit_area = self.load_scenario("Scenario_Building_UnitArea.xlsx", region_level=0)
-        self.s_building_component_option = self.load_scenario("Scenario_BuildingComponent_Option.xlsx", region_level=0)
-        self.s_building_component_availability = self.load_scenario("Scenario_BuildingComponent_Availability.xlsx", region_level=0, all_years=True, scenario_filter="id_scenario_building_component_availability")
-        self.s_building_component_cost_material = self.load_scenario("Scenario_BuildingComponent_Cost_Material.xlsx", region_level=0, scenario_filter="id_scenario_building_component_cost_material")
-        self.s_building_component_cost_labor = self.load_scenario("Scenario_BuildingComponent_Cost_Labor.xlsx", region_level=0, all_years=True)
-        self.s_building_component_cost_payback_time = self.load_scenario("Scenario_BuildingComponent_Cost_PaybackTime.xlsx", region_level=0)
-        self.s_building_component_input_labor = self.load_scenario("Scenario_BuildingComponent_Input_Labor.xlsx", region_level=0, all_years=True, scenario_filter="id_scenario_building_component_input_labor")
-        self.s_building_component_utility_power = self.load_scenario("Scenario_BuildingComponent_UtilityPower.xlsx", region_level=0)
-        self.s_unit_user = self.load_scenario("Scenario_UnitUser.xlsx", region_level=2, all_years=True, scenario_filter="id_scenario_unit_user")
-        self.s_unit_user_dwelling_ownership = self.load_scenario("Scenario_UnitUser_DwellingOwnership.xlsx", region_level=2)
-        self.s_heating_system = self.load_scenario("Scenario_HeatingSystem.xlsx")
-        self.s_heating_system_minimum_renewable_percentage = self.load_scenario("Scenario_HeatingSystem_MinimumRenewablePercentage.xlsx", region_level=0, scenario_filter="id_scenario_heating_technology_mandatory")
-        self.s_heating_technology_main = self.load_scenario("Scenario_HeatingTechnology_Main.xlsx", region_level=0)
-        self.s_heating_technology_efficiency = self.load_scenario("Scenario_HeatingTechnology_EfficiencyCoefficient.xlsx", all_years=True, scenario_filter="id_scenario_tech_efficiency")
-        self.s_heating_technology_availability = self.load_scenario("Scenario_HeatingTechnology_Availability.xlsx", region_level=0, scenario_filter="id_scenario_heating_technology_availability")
-        self.s_heating_technology_input_labor = self.load_scenario("Scenario_HeatingTechnology_Input_Labor.xlsx", region_level=0)
-        self.s_heating_technology_utility_power = self.load_scenario("Scenario_HeatingTechnology_UtilityPower.xlsx", region_level=0)
-        self.s_infrastructure_availability_district_heating = self.load_scenario("Scenario_Infrastructure_Availability_DistrictHeating.xlsx", all_years=True, scenario_filter="id_scenario_dh_availability")
-        self.s_infrastructure_availability_gas = self.load_scenario("Scenario_Infrastructure_Availability_Gas.xlsx", all_years=True, scenario_filter="id_scenario_gas_availability")
-        self.s_infrastructure_availability_hydrogen = self.load_scenario("Scenario_Infrastructure_Availability_Hydrogen.xlsx", all_years=True, scenario_filter="id_scenario_hydrogen_availability")
-        self.s_radiator = self.load_scenario("Scenario_Radiator.xlsx", region_level=0)
-        self.s_radiator_availability = self.load_scenario("Scenario_Radiator_Availability.xlsx", region_level=0)
-        self.s_radiator_cost_material = self.load_scenario("Scenario_Radiator_Cost_Material.xlsx", region_level=0)
-        self.s_radiator_cost_labor = self.load_scenario("Scenario_Radiator_Cost_Labor.xlsx", region_level=0)
-        self.s_radiator_cost_payback_time = self.load_scenario("Scenario_Radiator_Cost_PaybackTime.xlsx", region_level=0)
-        self.s_radiator_input_labor = self.load_scenario("Scenario_Radiator_Input_Labor.xlsx", region_level=0)
-        self.s_radiator_utility_power = self.load_scenario("Scenario_Radiator_UtilityPower.xlsx", region_level=0)
-        self.s_cooling_penetration_rate = self.load_scenario("Scenario_Cooling_PenetrationRate.xlsx", region_level=0, all_years=True)
-        self.s_cooling_technology_market_share = self.load_scenario("Scenario_CoolingTechnology_MarketShare.xlsx", region_level=0)
-        self.s_cooling_technology_efficiency_class_market_share = self.load_scenario("Scenario_CoolingTechnology_EfficiencyClass_MarketShare.xlsx", region_level=0)
-        self.s_cooling_technology_availability = self.load_scenario("Scenario_CoolingTechnology_Availability.xlsx", region_level=0)
-        self.s_cooling_technology_cost_material = self.load_scenario("Scenario_CoolingTechnology_Cost_Material.xlsx", region_level=0)
-        self.s_cooling_technology_cost_om = self.load_scenario("Scenario_CoolingTechnology_Cost_OM.xlsx", region_level=0)
-        self.s_cooling_technology_cost_labor = self.load_scenario("Scenario_CoolingTechnology_Cost_Labor.xlsx", region_level=0)
-        self.s_cooling_technology_cost_payback_time = self.load_scenario("Scenario_CoolingTechnology_Cost_PaybackTime.xlsx", region_level=0)
-        self.s_cooling_technology_input_labor = self.load_scenario("Scenario_CoolingTechnology_Input_Labor.xlsx", region_level=0)
-        self.s_cooling_technology_utility_power = self.load_scenario("Scenario_CoolingTechnology_UtilityPower.xlsx", region_level=0)
-        self.s_ventilation_penetration_rate = self.load_scenario("Scenario_Ventilation_PenetrationRate.xlsx", region_level=0, all_years=True)
-        self.s_ventilation_technology_market_share = self.load_scenario("Scenario_VentilationTechnology_MarketShare.xlsx", region_level=0)
-        self.s_ventilation_technology_efficiency_class_market_share = self.load_scenario("Scenario_VentilationTechnology_EfficiencyClass_MarketShare.xlsx", region_level=0)
-        self.s_ventilation_technology_availability = self.load_scenario("Scenario_VentilationTechnology_Availability.xlsx", region_level=0)
-        self.s_ventilation_technology_cost_material = self.load_scenario("Scenario_VentilationTechnology_Cost_Material.xlsx", region_level=0)
-        self.s_ventilation_technology_cost_om = self.load_scenario("Scenario_VentilationTechnology_Cost_OM.xlsx", region_level=0)
-        self.s_ventilation_technology_cost_labor = self.load_scenario("Scenario_VentilationTechnology_Cost_Labor.xlsx", region_level=0)
-        self.s_ventilation_technology_cost_payback_time = self.load_scenario("Scenario_VentilationTechnology_Cost_PaybackTime.xlsx", region_level=0)
-        self.s_ventilation_technology_input_labor = self.load_scenario("Scenario_VentilationTechnology_Input_Labor.xlsx", region_level=0)
-        self.s_ventilation_technology_utility_power = self.load_scenario("Scenario_VentilationTechnology_UtilityPower.xlsx", region_level=0)
-        self.s_pv_penetration_rate = self.load_scenario("Scenario_PV_PenetrationRate.xlsx", region_level=0, scenario_filter="id_scenario_pv_penetration_rate", all_years=True)
-        self.s_pv_self_consumption_rate = self.load_scenario("Scenario_PV_SelfConsumptionRate.xlsx", region_level=0, scenario_filter="id_scenario_pv_self_consumption_rate")
-        self.s_end_use_demand_appliance = self.load_scenario("Scenario_EndUseDemand_Appliance.xlsx", region_level=0, scenario_filter="id_scenario_teleworking", all_years=True)
-        self.s_end_use_demand_hot_water = self.load_scenario("Scenario_EndUseDemand_HotWater.xlsx", region_level=0, scenario_filter="id_scenario_teleworking", all_years=True)
-        self.s_interest_rate = self.load_scenario("Scenario_InterestRate.xlsx", region_level=0)
-        self.s_construction_residential_building = self.load_scenario("Scenario_Construction_ResidentialBuilding.xlsx")
-        self.s_construction_mandatory_renewable_heating = self.load_scenario("Scenario_Construction_MandatoryRenewableHeating.xlsx", region_level=0, scenario_filter="id_scenario_construction_mandatory_renewable_heating")
-        self.s_construction_pv_adoption_rate = self.load_scenario("Scenario_Construction_PVAdoptionRate.xlsx", region_level=0, scenario_filter="id_scenario_construction_pv_adoption_rate")
-        self.s_renovation_maximum_heating_intensity = self.load_scenario("Scenario_Renovation_MaximumHeatingIntensity.xlsx", region_level=0, scenario_filter="id_scenario_renovation_mandatory")
-        self.s_subsidy_building_renovation = self.load_scenario("Scenario_Subsidy_BuildingRenovation.xlsx", region_level=0, scenario_filter="id_scenario_subsidy_building_renovation")
-        self.s_subsidy_heating_modernization = self.load_scenario("Scenario_Subsidy_HeatingModernization.xlsx", region_level=0, scenario_filter="id_scenario_subsidy_heating_modernization")
-
-        # Dataframe
-        self.s_heating_technology_second = self.load_dataframe("Scenario_HeatingTechnology_Second.xlsx")
-        self.s_end_use_demand_appliance_df = self.load_dataframe("Scenario_EndUseDemand_Appliance.xlsx")
+    def setup_derived_tables(self):
+        super().setup_derived_tables()
+        self.setup_cost_data()
+
+    def get_derived_table_names(self) -> List[str]:
+        return super().get_derived_table_names() + self.cost_tables
+
+    def compile_bundle(self, workers: int = 0) -> str:
+        set_profile_precision(int(self.profile_precision))
+        return super().compile_bundle(workers=workers if workers > 0 else int(self.input_loading_workers))
+
+    def share_tables(self, store: "SharedTableStore"):
+        set_profile_precision(int(self.profile_precision))
+        super().share_tables(store)
+
+    def get_lazy_tables(self) -> Set[str]:
+        lazy_tables = {"p_renovation_sync_probability"}  # only used by `Building.conduct_sync_renovation`
+        if not self.renovation_mandatory:
+            lazy_tables.add("s_renovation_maximum_heating_intensity")
+        if not self.heating_technology_mandatory:
+            lazy_tables.add("s_heating_system_minimum_renewable_percentage")
+        return lazy_tables
 
     """
     setup agent params
@@ -271,6 +310,10 @@ class BuildingScenario(RenderScenario):
     setup cost data
     """
     def setup_cost_data(self):
+        # the cost tables are national (region_level=0), so they are shared by the scenarios of all regions
+        self.setup_cached_tables(self.cost_tables, self.calc_cost_data)
+
+    def calc_cost_data(self):
         self.setup_building_component_cost()
         self.setup_heating_technology_cost()
         self.setup_radiator_cost()
@@ -285,6 +328,10 @@ class BuildingScenario(RenderScenario):
     def calc_opex(energy_intensity: float, energy_price: float, om_cost: float):
         return energy_intensity * energy_price + om_cost
 
+    def create_cost_key_grid(self) -> KeyGrid:
+        # the cost tables are national (region_level=0), so they are built for the NUTS0 region of the scenario
+        return KeyGrid(key_cls=BuildingKey, id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
+
     @timer()
     def setup_building_component_cost(self):
 
@@ -301,42 +348,28 @@ class BuildingScenario(RenderScenario):
             "year"
         ], region_level=0)  # unit: euro/m2 (component area)
 
-        rkey = BuildingKey(id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
-        for id_sector in self.sectors.keys():
-            rkey.id_sector = id_sector
-            for id_subsector in self.r_sector_subsector.get_item(rkey):
-                rkey.id_subsector = id_subsector
-                for id_building_type in self.r_subsector_building_type.get_item(rkey):
-                    rkey.id_building_type = id_building_type
-                    for id_building_component in self.building_components.keys():
-                        rkey.id_building_component = id_building_component
-                        for id_building_component_option in self.r_building_component_option.get_item(rkey):
-                            rkey.id_building_component_option = id_building_component_option
-                            for id_building_component_option_efficiency_class in self.building_component_option_efficiency_classes.keys():
-                                rkey.id_building_component_option_efficiency_class = id_building_component_option_efficiency_class
-                                for id_building_action in self.building_actions.keys():
-                                    rkey.id_building_action = id_building_action
-                                    for year in range(self.start_year, self.end_year + 1):
-                                        rkey.year = year
-                                        if self.s_building_component_availability.get_item(rkey):
-                                            self.building_component_capex.set_item(rkey=rkey, value=self.calc_capex(
-                                                investment_cost=self.s_building_component_cost_material.get_item(rkey) + self.s_building_component_input_labor.get_item(rkey) * self.s_building_component_cost_labor.get_item(rkey),
-                                                period_num=self.s_building_component_cost_payback_time.get_item(rkey),
-                                                interest_rate=self.s_interest_rate.get_item(rkey)
-                                            ))
+        grid = (
+            self.create_cost_key_grid()
+            .expand("id_sector", self.sectors.keys())
+            .expand_relation("id_subsector", self.r_sector_subsector)
+            .expand_relation("id_building_type", self.r_subsector_building_type)
+            .expand("id_building_component", self.building_components.keys())
+            .expand_relation("id_building_component_option", self.r_building_component_option)
+            .expand("id_building_component_option_efficiency_class", self.building_component_option_efficiency_classes.keys())
+            .expand("id_building_action", self.building_actions.keys())
+            .expand("year", range(self.start_year, self.end_year + 1))
+        )
+        grid = grid.filter(self.s_building_component_availability.get_items(grid.columns) != 0)
+        keys = grid.columns
+        self.building_component_capex.set_items(keys, self.calc_capex(
+            investment_cost=self.s_building_component_cost_material.get_items(keys) + self.s_building_component_input_labor.get_items(keys) * self.s_building_component_cost_labor.get_items(keys),
+            period_num=self.s_building_component_cost_payback_time.get_items(keys),
+            interest_rate=self.s_interest_rate.get_items(keys)
+        ))
 
     @timer()
     def setup_heating_technology_cost(self):
 
-        def calc_heating_technology_energy_cost():
-            opex = 0
-            for id_energy_carrier in self.r_heating_technology_energy_carrier.get_item(rkey):
-                rkey.id_energy_carrier = id_energy_carrier
-                energy_intensity = 1 / self.s_heating_technology_efficiency.get_item(rkey)
-                energy_price = self.s_final_energy_carrier_price.get_item(rkey)
-                opex += energy_intensity * energy_price
-            return opex
-
         self.heating_technology_energy_cost = RenderDict.create_empty_rdict(key_cols=[
             "id_scenario",
             "id_region",
@@ -347,19 +380,23 @@ class BuildingScenario(RenderScenario):
             "year"
         ], region_level=0)  # unit: euro/kWh
 
-        rkey = BuildingKey(id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
-        for id_sector in self.sectors.keys():
-            rkey.id_sector = id_sector
-            for id_subsector in self.r_sector_subsector.get_item(rkey):
-                rkey.id_subsector = id_subsector
-                for id_heating_technology in self.heating_technologies.keys():
-                    rkey.id_heating_technology = id_heating_technology
-                    for id_heating_system_action in self.heating_system_actions.keys():
-                        rkey.id_heating_system_action = id_heating_system_action
-                        for year in range(self.start_year, self.end_year + 1):
-                            rkey.year = year
-                            if self.s_heating_technology_availability.get_item(rkey):
-                                self.heating_technology_energy_cost.set_item(rkey=rkey, value=calc_heating_technology_energy_cost())
+        grid = (
+            self.create_cost_key_grid()
+            .expand("id_sector", self.sectors.keys())
+            .expand_relation("id_subsector", self.r_sector_subsector)
+            .expand("id_heating_technology", self.heating_technologies.keys())
+            .expand("id_heating_system_action", self.heating_system_actions.keys())
+            .expand("year", range(self.start_year, self.end_year + 1))
+        )
+        grid = grid.filter(self.s_heating_technology_availability.get_items(grid.columns) != 0)
+        # the energy cost is summed over the energy carriers of the heating technology
+        carrier_grid = grid.expand_relation("id_energy_carrier", self.r_heating_technology_energy_carrier)
+        carrier_keys = carrier_grid.columns
+        energy_intensity = 1 / self.s_heating_technology_efficiency.get_items(carrier_keys)
+        energy_price = self.s_final_energy_carrier_price.get_items(carrier_keys)
+        self.heating_technology_energy_cost.set_items(grid.columns, np.bincount(
+            carrier_grid.parent_rows, weights=energy_intensity * energy_price, minlength=len(grid)
+        ))
 
     @timer()
     def setup_radiator_cost(self):
@@ -375,33 +412,26 @@ class BuildingScenario(RenderScenario):
             "year"
         ], region_level=0)  # unit: euro/m2 (living area)
 
-        rkey = BuildingKey(id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
-        for id_sector in self.sectors.keys():
-            rkey.id_sector = id_sector
-            for id_subsector in self.r_sector_subsector.get_item(rkey):
-                rkey.id_subsector = id_subsector
-                for id_building_type in self.r_subsector_building_type.get_item(rkey):
-                    rkey.id_building_type = id_building_type
-                    for id_radiator in self.radiators.keys():
-                        rkey.id_radiator = id_radiator
-                        for id_building_action in self.building_actions.keys():
-                            rkey.id_building_action = id_building_action
-                            for year in range(self.start_year, self.end_year + 1):
-                                rkey.year = year
-                                if self.s_radiator_availability.get_item(rkey):
-                                    self.radiator_capex.set_item(rkey=rkey, value=self.calc_capex(
-                                        investment_cost=self.s_radiator_cost_material.get_item(rkey) + self.s_radiator_input_labor.get_item(rkey) * self.s_radiator_cost_labor.get_item(rkey),
-                                        period_num=self.s_radiator_cost_payback_time.get_item(rkey),
-                                        interest_rate=self.s_interest_rate.get_item(rkey)
-                                    ))
+        grid = (
+            self.create_cost_key_grid()
+            .expand("id_sector", self.sectors.keys())
+            .expand_relation("id_subsector", self.r_sector_subsector)
+            .expand_relation("id_building_type", self.r_subsector_building_type)
+            .expand("id_radiator", self.radiators.keys())
+            .expand("id_building_action", self.building_actions.keys())
+            .expand("year", range(self.start_year, self.end_year + 1))
+        )
+        grid = grid.filter(self.s_radiator_availability.get_items(grid.columns) != 0)
+        keys = grid.columns
+        self.radiator_capex.set_items(keys, self.calc_capex(
+            investment_cost=self.s_radiator_cost_material.get_items(keys) + self.s_radiator_input_labor.get_items(keys) * self.s_radiator_cost_labor.get_items(keys),
+            period_num=self.s_radiator_cost_payback_time.get_items(keys),
+            interest_rate=self.s_interest_rate.get_items(keys)
+        ))
 
     @timer()
     def setup_cooling_technology_cost(self):
 
-        def get_energy_price():
-            rkey.id_energy_carrier = self.r_cooling_technology_energy_carrier.get_item(rkey)[0]
-            return self.s_final_energy_carrier_price.get_item(rkey)
-
         self.cooling_technology_capex = RenderDict.create_empty_rdict(key_cols=[
             "id_scenario",
             "id_region",
@@ -422,36 +452,32 @@ class BuildingScenario(RenderScenario):
             "year"
         ], region_level=0)  # unit: euro/kWh
 
-        rkey = BuildingKey(id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
-        for id_sector in self.sectors.keys():
-            rkey.id_sector = id_sector
-            for id_subsector in self.r_sector_subsector.get_item(rkey):
-                rkey.id_subsector = id_subsector
-                for id_cooling_technology in self.cooling_technologies.keys():
-                    rkey.id_cooling_technology = id_cooling_technology
-                    for id_cooling_technology_efficiency_class in self.r_cooling_technology_efficiency_class.get_item(rkey):
-                        rkey.id_cooling_technology_efficiency_class = id_cooling_technology_efficiency_class
-                        for year in range(self.start_year, self.end_year + 1):
-                            rkey.year = year
-                            if self.s_cooling_technology_availability.get_item(rkey):
-                                self.cooling_technology_capex.set_item(rkey=rkey, value=self.calc_capex(
-                                    investment_cost=self.s_cooling_technology_cost_material.get_item(rkey) + self.s_cooling_technology_input_labor.get_item(rkey) * self.s_cooling_technology_cost_labor.get_item(rkey),
-                                    period_num=self.s_cooling_technology_cost_payback_time.get_item(rkey),
-                                    interest_rate=self.s_interest_rate.get_item(rkey)
-                                ))
-                                self.cooling_technology_opex.set_item(rkey=rkey, value=self.calc_opex(
-                                    energy_intensity=1 / self.p_cooling_technology_efficiency.get_item(rkey),
-                                    energy_price=get_energy_price(),
-                                    om_cost=self.s_cooling_technology_cost_om.get_item(rkey)
-                                ))
+        grid = (
+            self.create_cost_key_grid()
+            .expand("id_sector", self.sectors.keys())
+            .expand_relation("id_subsector", self.r_sector_subsector)
+            .expand("id_cooling_technology", self.cooling_technologies.keys())
+            .expand_relation("id_cooling_technology_efficiency_class", self.r_cooling_technology_efficiency_class)
+            .expand("year", range(self.start_year, self.end_year + 1))
+        )
+        grid = grid.filter(self.s_cooling_technology_availability.get_items(grid.columns) != 0)
+        keys = grid.columns
+        self.cooling_technology_capex.set_items(keys, self.calc_capex(
+            investment_cost=self.s_cooling_technology_cost_material.get_items(keys) + self.s_cooling_technology_input_labor.get_items(keys) * self.s_cooling_technology_cost_labor.get_items(keys),
+            period_num=self.s_cooling_technology_cost_payback_time.get_items(keys),
+            interest_rate=self.s_interest_rate.get_items(keys)
+        ))
+        self.cooling_technology_opex.set_items(keys, self.calc_opex(
+            energy_intensity=1 / self.p_cooling_technology_efficiency.get_items(keys),
+            energy_price=self.s_final_energy_carrier_price.get_items(
+                grid.expand_relation("id_energy_carrier", self.r_cooling_technology_energy_carrier, first_only=True).columns
+            ),
+            om_cost=self.s_cooling_technology_cost_om.get_items(keys)
+        ))
 
     @timer()
     def setup_ventilation_technology_cost(self):
 
-        def get_energy_price():
-            rkey.id_energy_carrier = self.r_ventilation_technology_energy_carrier.get_item(rkey)[0]
-            return self.s_final_energy_carrier_price.get_item(rkey)
-
         self.ventilation_technology_capex = RenderDict.create_empty_rdict(key_cols=[
             "id_scenario",
             "id_region",
@@ -472,28 +498,28 @@ class BuildingScenario(RenderScenario):
             "year"
         ], region_level=0)  # unit: euro/m2-year (total living area)
 
-        rkey = BuildingKey(id_scenario=self.id, id_region=int(list(str(self.id_region))[0]))
-        for id_sector in self.sectors.keys():
-            rkey.id_sector = id_sector
-            for id_subsector in self.r_sector_subsector.get_item(rkey):
-                rkey.id_subsector = id_subsector
-                for id_ventilation_technology in self.ventilation_technologies.keys():
-                    rkey.id_ventilation_technology = id_ventilation_technology
-                    for id_ventilation_technology_efficiency_class in self.r_ventilation_technology_efficiency_class.get_item(rkey):
-                        rkey.id_ventilation_technology_efficiency_class = id_ventilation_technology_efficiency_class
-                        for year in range(self.start_year, self.end_year + 1):
-                            rkey.year = year
-                            if self.s_ventilation_technology_availability.get_item(rkey):
-                                self.ventilation_technology_capex.set_item(rkey=rkey, value=self.calc_capex(
-                                    investment_cost=self.s_ventilation_technology_cost_material.get_item(rkey) + self.s_ventilation_technology_input_labor.get_item(rkey) * self.s_ventilation_technology_cost_labor.get_item(rkey),
-                                    period_num=self.s_ventilation_technology_cost_payback_time.get_item(rkey),
-                                    interest_rate=self.s_interest_rate.get_item(rkey)
-                                ))
-                                self.ventilation_technology_opex.set_item(rkey=rkey, value=self.calc_opex(
-                                    energy_intensity=self.p_ventilation_technology_energy_intensity.get_item(rkey),
-                                    energy_price=get_energy_price(),
-                                    om_cost=self.s_ventilation_technology_cost_om.get_item(rkey)
-                                ))
+        grid = (
+            self.create_cost_key_grid()
+            .expand("id_sector", self.sectors.keys())
+            .expand_relation("id_subsector", self.r_sector_subsector)
+            .expand("id_ventilation_technology", self.ventilation_technologies.keys())
+            .expand_relation("id_ventilation_technology_efficiency_class", self.r_ventilation_technology_efficiency_class)
+            .expand("year", range(self.start_year, self.end_year + 1))
+        )
+        grid = grid.filter(self.s_ventilation_technology_availability.get_items(grid.columns) != 0)
+        keys = grid.columns
+        self.ventilation_technology_capex.set_items(keys, self.calc_capex(
+            investment_cost=self.s_ventilation_technology_cost_material.get_items(keys) + self.s_ventilation_technology_input_labor.get_items(keys) * self.s_ventilation_technology_cost_labor.get_items(keys),
+            period_num=self.s_ventilation_technology_cost_payback_time.get_items(keys),
+            interest_rate=self.s_interest_rate.get_items(keys)
+        ))
+        self.ventilation_technology_opex.set_items(keys, self.calc_opex(
+            energy_intensity=self.p_ventilation_technology_energy_intensity.get_items(keys),
+            energy_price=self.s_final_energy_carrier_price.get_items(
+                grid.expand_relation("id_energy_carrier", self.r_ventilation_technology_energy_carrier, first_only=True).columns
+            ),
+            om_cost=self.s_ventilation_technology_cost_om.get_items(keys)
+        ))
 
     """
     create data containers
@@ -559,4 +585,35 @@ class BuildingScenario(RenderScenario):
         self.building_construction_number = RenderDict.create_empty_rdict(key_cols=building_count_key_cols)
         self.building_demolition_number = RenderDict.create_empty_rdict(key_cols=building_count_key_cols)
 
+        # calculation caches
+        self.r5c1_cache = R5C1Cache(memory_budget=cons.R5C1_CACHE_MEMORY_BUDGET)
+        self.r5c1_representative_days_cache = {}  # {(id_region, weather year): RepresentativeDays}
+        self.weather_profiles_cache = {}  # {(id_region of the weather profiles, weather year): weather profiles}
 
+    """
+    weather profiles
+    """
+    def get_weather_profiles(self, rkey: "BuildingKey") -> dict:
+        """
+        rkey: with the year already adjusted for the weather profiles.
+        The profiles derived from the weather are calculated once per weather region and weather year.
+        """
+        key = (convert_id_region(rkey.id_region, self.pr_weather_temperature.region_level), rkey.year)
+        if key not in self.weather_profiles_cache:
+            temperature = self.pr_weather_temperature.get_item(rkey)
+            radiation = {}
+            rkey_orientation = rkey.make_copy()
+            for id_orientation in self.orientations.keys():
+                rkey_orientation.id_orientation = id_orientation
+                radiation[id_orientation] = self.pr_weather_radiation.get_item(rkey_orientation)
+            epsilon = 0.9  # emissivity of the thermal radiation of the outer surface
+            # Stefan-Boltzmann constant: σ = 5.67 × 10-8 W/(m2⋅K4)
+            sigma = 5.67 * 10 ** (-8)
+            self.weather_profiles_cache[key] = {
+                "temperature": temperature,
+                "radiation": radiation,
+                "total_radiation": sum(radiation.values()),
+                # external radiant heat transfer coefficient
+                "h_r": 4 * epsilon * sigma * ((temperature + 273.15) ** 3),
+            }
+        return self.weather_profiles_cache[key]
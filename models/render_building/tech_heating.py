@@ -101,7 +101,7 @@ class HeatingSystem:
             total_market_share += row[str(self.rkey.year)]
             second_technologies[row["id_heating_technology"]] = row[str(self.rkey.year)]
         if random.uniform(0, 1) < total_market_share:
-            rkey = self.rkey.make_copy().set_id({"id_heating_technology": dict_sample(second_technologies)})
+            rkey = self.rkey.with_(id_heating_technology=dict_sample(second_technologies))
             # init second heating technology
             self.heating_technology_second = HeatingTechnology(
                 rkey=rkey,
@@ -187,10 +187,10 @@ class HeatingTechnology:
     def update_energy_intensity_space_heating(self):
         self.space_heating_energy_intensities = []
         for id_energy_carrier in self.scenario.r_heating_technology_energy_carrier.get_item(self.rkey):
-            rkey = self.rkey.make_copy().set_id({
-                "id_energy_carrier": id_energy_carrier,
-                "year": self.installation_year
-            })
+            rkey = self.rkey.with_(
+                id_energy_carrier=id_energy_carrier,
+                year=self.installation_year
+            )
             adjusted_efficiency = (
                 self.scenario.s_heating_technology_efficiency.get_item(rkey) *
                 self.get_space_heating_efficiency_adjustment_factor()
@@ -204,10 +204,10 @@ class HeatingTechnology:
     def update_energy_intensity_hot_water(self):
         self.hot_water_energy_intensities = []
         for id_energy_carrier in self.scenario.r_heating_technology_energy_carrier.get_item(self.rkey):
-            rkey = self.rkey.make_copy().set_id({
-                "id_energy_carrier": id_energy_carrier,
-                "year": self.installation_year
-            })
+            rkey = self.rkey.with_(
+                id_energy_carrier=id_energy_carrier,
+                year=self.installation_year
+            )
             self.hot_water_energy_intensities.append(EnergyIntensity(
                 id_end_use=cons.ID_END_USE_HOT_WATER,
                 id_energy_carrier=rkey.id_energy_carrier,
@@ -2,6 +2,7 @@ from typing import TYPE_CHECKING
 
 import numpy as np
 
+from models.render.precision import sum_profile
 from models.render_building.building_key import BuildingKey
 
 if TYPE_CHECKING:
@@ -22,7 +23,7 @@ class PhotovoltaicSystem:
         self.size = roof_area * 0.8 * 0.12
         # 80% of the roof is used for PV
         # 0.12kWp per square meter (source: https://www.comparemysolar.co.uk/learn-about-solar/solar-education/your-own-roof/)
-        self.generation = generation_profile.sum() * self.size / 1000  # Wh --> kWh
+        self.generation = sum_profile(generation_profile) * self.size / 1000  # Wh --> kWh
         self.self_consumption_rate = self.scenario.s_pv_self_consumption_rate.get_item(self.rkey)  # could be used to reflect SEMS
         self.self_consumption = self.generation * self.self_consumption_rate
         self.pv2grid = self.generation - self.self_consumption  # TODO: loss needs to be considered?
@@ -36,7 +36,7 @@ class Radiator:
         )
 
     def select(self, id_building_action: int):
-        rkey = self.rkey.make_copy().set_id({"id_building_action": id_building_action})
+        rkey = self.rkey.with_(id_building_action=id_building_action)
         d_option_cost = {}
         for id_radiator in self.scenario.radiators.keys():
             rkey.id_radiator = id_radiator
@@ -1,12 +1,17 @@
 import os
 import os.path
 import sqlite3
+from typing import Optional
 
 import pandas as pd
 from Melodie import Config
 
+from utils.input_cache import get_input_cache_dir, read_dataframe_cached
 
-def read_dataframe(file_path: str):
+
+def read_dataframe(file_path: str, cache_dir: Optional[str] = None):
+    if cache_dir is not None:
+        return read_dataframe_cached(file_path=file_path, cache_dir=cache_dir)
     if file_path.endswith(".xlsx"):
         df = pd.read_excel(file_path, engine="openpyxl")
     else:
@@ -24,7 +29,7 @@ def get_data_files(folder: str):
 def get_id_relevant_tables(cfg: "Config", id_name: str):
     tables = {}
     for file_name in get_data_files(cfg.input_folder):
-        df = read_dataframe(os.path.join(cfg.input_folder, file_name))
+        df = read_dataframe(os.path.join(cfg.input_folder, file_name), cache_dir=get_input_cache_dir(cfg))
         if id_name in list(df.columns):
             tables[file_name] = df
     return tables
@@ -52,7 +57,7 @@ def pack_sqlite(cfg: "Config"):
     file_names = get_data_files(cfg.input_folder)
     conn = sqlite3.connect(os.path.join(cfg.output_folder, f'{cfg.project_name}.sqlite'))
     for file_name in file_names:
-        df = read_dataframe(os.path.join(cfg.input_folder, file_name))
+        df = read_dataframe(os.path.join(cfg.input_folder, file_name), cache_dir=get_input_cache_dir(cfg))
         try:
             df.to_sql(name=file_name.split('.')[0], con=conn, if_exists='replace', index=False)
         except sqlite3.OperationalError as e:
@@ -1,6 +1,9 @@
 import random
+from bisect import bisect_left
+from itertools import accumulate
 from typing import Dict, Any
 import math
+
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,6 +27,22 @@ def dict_sample(options: Dict[Any, float]) -> Any:
     return option_chosen_key
 
 
+class CategoricalSampler:
+    """
+    Precomputed version of `dict_sample` for options that are sampled repeatedly:
+    the cumulative probabilities are calculated once and each sample is one uniform draw and a bisection.
+    """
+
+    def __init__(self, options: Dict[Any, float]):
+        value_sum = sum(options.values())
+        self.keys = list(options.keys())
+        self.prob_accumulated = list(accumulate(value / value_sum if value_sum > 0 else 1 for value in options.values()))
+
+    def sample(self) -> Any:
+        index = bisect_left(self.prob_accumulated, random.uniform(0, 1))
+        return self.keys[index] if index < len(self.keys) else None
+
+
 def dict_normalize(options: Dict[Any, float]) -> Dict[Any, float]:
     value_min = min(options.values())
     value_max = max(options.values())
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import pickle
+import threading
+from typing import Optional, TYPE_CHECKING
+
+import pandas as pd
+
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from Melodie import Config
+
+logger = get_logger(__name__)
+
+# Binary cache of the input tables: each table is stored as a pickled DataFrame after a header with the size, mtime and md5
+# of its source file. If size and mtime are unchanged, the cache is used without reading the source file;
+# otherwise the md5 decides whether the source file is parsed again (e.g., a touched but unchanged file is not).
+# The header is pickled separately, so that the freshness of a cache can be checked without loading the DataFrame.
+INPUT_CACHE_VERSION = 2
+
+
+def get_input_cache_dir(cfg: "Config") -> str:
+    return os.path.join(cfg.project_root, cfg.temp_folder, "cache", "input")
+
+
+def calc_file_md5(file_path: str) -> str:
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 ** 2), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def read_source_file(file_path: str) -> pd.DataFrame:
+    if file_path.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file_path, engine="openpyxl" if file_path.endswith(".xlsx") else None)
+    else:
+        df = pd.read_csv(file_path)
+    return df
+
+
+def get_cache_path(file_path: str, cache_dir: str) -> str:
+    cache_name = hashlib.md5(os.path.abspath(file_path).encode()).hexdigest()
+    return os.path.join(cache_dir, f"{os.path.basename(file_path)}.{cache_name}.pkl")
+
+
+def get_source_stat(file_path: str) -> dict:
+    file_stat = os.stat(file_path)
+    return {"size": file_stat.st_size, "mtime": file_stat.st_mtime_ns}
+
+
+def read_cache(cache_path: str, with_df: bool = True) -> Optional[dict]:
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+            if not isinstance(cached, dict) or cached.get("version") != INPUT_CACHE_VERSION:
+                return None
+            if with_df:
+                cached["df"] = pickle.load(f)
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        logger.warning(f"input cache {cache_path} is broken and will be rebuilt")
+        return None
+    return cached
+
+
+def is_cache_fresh(file_path: str, cache_dir: str) -> bool:
+    cached = read_cache(get_cache_path(file_path, cache_dir), with_df=False)
+    source = get_source_stat(file_path)
+    return cached is not None and cached["size"] == source["size"] and cached["mtime"] == source["mtime"]
+
+
+def read_dataframe_cached(file_path: str, cache_dir: str) -> pd.DataFrame:
+    source = get_source_stat(file_path)
+    cache_path = get_cache_path(file_path, cache_dir)
+    cached = read_cache(cache_path)
+    if cached is not None:
+        if cached["size"] == source["size"] and cached["mtime"] == source["mtime"]:
+            return cached["df"]
+        source["md5"] = calc_file_md5(file_path)
+        if cached["md5"] == source["md5"]:
+            write_cache(cache_path, source, cached["df"])
+            return cached["df"]
+    else:
+        source["md5"] = calc_file_md5(file_path)
+    df = read_source_file(file_path)
+    write_cache(cache_path, source, df)
+    return df
+
+
+def update_cache(file_path: str, cache_dir: str) -> str:
+    # run in the worker processes of `RenderScenario.prefetch_input_files`:
+    # the source file is parsed and cached there, but the DataFrame is not sent back to the main process
+    read_dataframe_cached(file_path, cache_dir)
+    return file_path
+
+
+def write_cache(cache_path: str, source: dict, df: pd.DataFrame):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # written to a temporary file first, so that parallel workers never read a partially written cache
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump({"version": INPUT_CACHE_VERSION, **source}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)